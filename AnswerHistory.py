@@ -0,0 +1,203 @@
+import os
+import time
+import struct
+
+# One answer: number of the question ID, selected option (-1 for none), correct, time in seconds
+RECORD = struct.Struct('<IhBI')
+# Header of the statistics snapshot: number of answers and of question IDs it covers
+SNAPSHOT_HEADER = struct.Struct('<QI')
+# Statistics of one question in the snapshot, by number: answers, wrong answers, last answer
+SNAPSHOT_STATS = struct.Struct('<III')
+# Write a new snapshot once this many answers were added since the last one
+SNAPSHOT_INTERVAL = 10000
+
+
+class AnswerStats:
+    """Number of answers, wrong answers and the time of the last answer,
+    for one question or one category"""
+
+    __slots__ = ('attempts', 'wrong', 'last_seen')
+
+    def __init__(self):
+        self.attempts = 0
+        self.wrong = 0
+        self.last_seen = 0
+
+    def add(self, correct, when):
+        self.attempts += 1
+        if not correct:
+            self.wrong += 1
+        if when > self.last_seen:
+            self.last_seen = when
+
+    def merge(self, other):
+        self.attempts += other.attempts
+        self.wrong += other.wrong
+        self.last_seen = max(self.last_seen, other.last_seen)
+
+    @property
+    def error_rate(self):
+        return self.wrong / self.attempts if self.attempts else 0.0
+
+
+class AnswerHistory:
+    """Every graded answer, appended to a compact binary file next to the questions.
+
+    Each answer takes RECORD.size bytes: the question ID is stored once in a separate
+    file (<path>.ids) and referred to by its line number. The statistics per question
+    are saved in a snapshot (<path>.stats) together with the number of answers they
+    cover, so loading only replays the answers added after it. The statistics per
+    question and per category are updated with every answer, so reading them never
+    goes through the history itself.
+
+    category_of maps a question ID to its category, or None for questions that are
+    no longer in the bank."""
+
+    def __init__(self, path, category_of=None):
+        self.path = path
+        self.ids_path = path + '.ids'
+        self.snapshot_path = path + '.stats'
+        self.category_of = category_of or (lambda question_id: None)
+        self.ids = []      # number -> question ID
+        self.numbers = {}  # question ID -> number
+        self.records = 0   # answers in the history, including those not written yet
+        self.snapshot_records = 0  # answers covered by the snapshot on disk
+        self.question_stats = {}  # question ID -> AnswerStats
+        self.category_stats = {}  # category -> AnswerStats
+        self.pending_ids = []
+        self.pending = bytearray()
+        self.load()
+
+    def load(self):
+        """Read the snapshot and the answers after it. A record or ID cut off by a crash is dropped."""
+        try:
+            with open(self.ids_path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            data = b''
+        complete = data.rfind(b'\n') + 1
+        if complete < len(data):
+            with open(self.ids_path, 'r+b') as f:
+                f.truncate(complete)
+        for line in data[:complete].decode('utf-8').splitlines():
+            self.numbers[line] = len(self.ids)
+            self.ids.append(line)
+
+        try:
+            size = os.path.getsize(self.path)
+        except FileNotFoundError:
+            size = 0
+        complete = size - size % RECORD.size
+        if complete < size:
+            with open(self.path, 'r+b') as f:
+                f.truncate(complete)
+        start = self.load_snapshot(complete // RECORD.size)
+        if start < complete // RECORD.size:
+            with open(self.path, 'rb') as f:
+                f.seek(start * RECORD.size)
+                data = f.read(complete - start * RECORD.size)
+            for number, _, correct, when in RECORD.iter_unpack(data):
+                self.add(number, correct, when)
+        self.records = complete // RECORD.size
+
+        # The categories are taken from the bank, as questions may have moved
+        for question_id, stats in self.question_stats.items():
+            category = self.category_of(question_id)
+            if category is not None:
+                self.stats_of_category(category).merge(stats)
+
+    def load_snapshot(self, records):
+        """Read the statistics per question from the snapshot and return the number of
+        answers it covers. A snapshot that doesn't fit the history is ignored."""
+        try:
+            with open(self.snapshot_path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return 0
+        if len(data) < SNAPSHOT_HEADER.size:
+            return 0
+        covered, count = SNAPSHOT_HEADER.unpack_from(data)
+        if covered > records or count > len(self.ids) or len(data) != SNAPSHOT_HEADER.size + count * SNAPSHOT_STATS.size:
+            # The history was replaced or cut off after the snapshot was written
+            return 0
+        for number, (attempts, wrong, last_seen) in enumerate(
+            SNAPSHOT_STATS.iter_unpack(memoryview(data)[SNAPSHOT_HEADER.size:])
+        ):
+            if attempts:
+                stats = self.question_stats[self.ids[number]] = AnswerStats()
+                stats.attempts, stats.wrong, stats.last_seen = attempts, wrong, last_seen
+        self.snapshot_records = covered
+        return covered
+
+    def write_snapshot(self):
+        """Save the statistics per question for all written answers. The new file is
+        written next to the snapshot and swapped in, like the compacted mark journal."""
+        empty = AnswerStats()
+        data = bytearray(SNAPSHOT_HEADER.pack(self.records, len(self.ids)))
+        for question_id in self.ids:
+            stats = self.question_stats.get(question_id, empty)
+            data += SNAPSHOT_STATS.pack(stats.attempts, stats.wrong, stats.last_seen)
+        temp_path = self.snapshot_path + '.tmp'
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.snapshot_path)
+        self.snapshot_records = self.records
+
+    def stats_of_category(self, category):
+        stats = self.category_stats.get(category)
+        if stats is None:
+            stats = self.category_stats[category] = AnswerStats()
+        return stats
+
+    def add(self, number, correct, when):
+        """Update the statistics of a question with an answer"""
+        question_id = self.ids[number]
+        stats = self.question_stats.get(question_id)
+        if stats is None:
+            stats = self.question_stats[question_id] = AnswerStats()
+        stats.add(correct, when)
+
+    def record(self, question_id, selected, correct, when=None):
+        """Add an answer. It is written to the file with the next flush()."""
+        when = int(time.time() if when is None else when)
+        number = self.numbers.get(question_id)
+        if number is None:
+            number = self.numbers[question_id] = len(self.ids)
+            self.ids.append(question_id)
+            self.pending_ids.append(question_id)
+        selected = -1 if selected is None else selected
+        self.pending += RECORD.pack(number, selected, bool(correct), when)
+        self.records += 1
+        self.add(number, bool(correct), when)
+        category = self.category_of(question_id)
+        if category is not None:
+            self.stats_of_category(category).add(bool(correct), when)
+
+    def flush(self):
+        """Write the new answers with one write per file. The IDs go first,
+        so every written answer refers to an ID that is already on disk."""
+        if self.pending_ids:
+            with open(self.ids_path, 'a', encoding='utf-8', newline='\n') as f:
+                f.write(''.join(question_id + '\n' for question_id in self.pending_ids))
+                f.flush()
+                os.fsync(f.fileno())
+            self.pending_ids.clear()
+        if self.pending:
+            with open(self.path, 'ab') as f:
+                f.write(self.pending)
+                f.flush()
+                os.fsync(f.fileno())
+            self.pending.clear()
+        if self.records - self.snapshot_records >= SNAPSHOT_INTERVAL:
+            self.write_snapshot()
+
+    def close(self):
+        """Write the new answers and a snapshot of the statistics, so the next start replays nothing"""
+        self.flush()
+        if self.records > self.snapshot_records:
+            self.write_snapshot()
+
+    def __len__(self):
+        return self.records
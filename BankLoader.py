@@ -0,0 +1,38 @@
+import time
+from PyQt6.QtCore import QThread, pyqtSignal
+from Tracing import span
+
+
+class BankLoader(QThread):
+    """Opens the question bank and its review schedule on a worker thread, so the window
+    can be shown while the questions are parsed. loaded is emitted with the bank and the
+    ReviewScheduler once they are ready, failed with an error message if they could not
+    be opened."""
+
+    loaded = pyqtSignal(object, object)
+    failed = pyqtSignal(str)
+
+    def __init__(self, path, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.path = path
+        self.seconds = None  # Time it took to open the bank
+
+    def run(self):
+        start = time.perf_counter()
+        bank = None
+        try:
+            with span('load_bank'):
+                # Imported here, so the parsing modules are not loaded before the window is shown
+                from QuestionBank import open_bank
+                from ReviewScheduler import ReviewScheduler
+                bank = open_bank(self.path)
+                # Reading the review journal may compact it, which is file work as well
+                scheduler = ReviewScheduler.open(bank.path)
+        except Exception as error:
+            # Without the bank the quiz can't start; the window shows the message instead
+            if bank is not None:
+                bank.close()
+            self.failed.emit(f"{type(error).__name__}: {error}")
+            return
+        self.seconds = time.perf_counter() - start
+        self.loaded.emit(bank, scheduler)
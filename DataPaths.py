@@ -0,0 +1,57 @@
+import os
+import sys
+
+# Where the quiz keeps the files it writes itself: caches and per-user states like marks.
+# Kept apart from QuestionBank.py, so modules that only need a path don't load the parsing code.
+
+
+def user_cache_dir():
+    """Folder for caches of the current user"""
+    root = (
+        os.environ.get('LOCALAPPDATA')
+        or os.environ.get('XDG_CACHE_HOME')
+        or os.path.join(os.path.expanduser('~'), '.cache')
+    )
+    return os.path.join(root, 'Quiz')
+
+
+def inside(path, folder):
+    """True if path is folder or lies below it"""
+    path, folder = os.path.abspath(path), os.path.abspath(folder)
+    try:
+        return os.path.commonpath([path, folder]) == folder
+    except ValueError:
+        # Different drives on Windows
+        return False
+
+
+def unpacked(path):
+    """True if path lies in the temporary folder a onefile build unpacks itself into.
+    That folder is deleted when the quiz exits; a onedir build keeps its files next to the exe."""
+    bundle = getattr(sys, '_MEIPASS', None)
+    if bundle is None or inside(bundle, os.path.dirname(sys.executable)):
+        return False
+    return inside(path, bundle)
+
+
+def user_data_dir():
+    """Folder for data of the current user that must survive a restart"""
+    root = (
+        os.environ.get('APPDATA')
+        or os.environ.get('XDG_DATA_HOME')
+        or os.path.join(os.path.expanduser('~'), '.local', 'share')
+    )
+    return os.path.join(root, 'Quiz')
+
+
+def state_path(path, ending):
+    """File with a state the quiz writes for the questions at path, e.g. the review
+    journal: next to the questions, or in the user data folder if they lie in the
+    unpacked folder of a onefile build, which is deleted when the quiz exits"""
+    if unpacked(path):
+        folder = user_data_dir()
+        os.makedirs(folder, exist_ok=True)
+        return os.path.join(folder, os.path.basename(os.path.normpath(path)) + ending)
+    if os.path.isdir(path):
+        return os.path.join(path, 'bank' + ending)
+    return path + ending
@@ -0,0 +1,97 @@
+import os
+
+# Width the quiz wraps answer options at
+OPTION_WRAP_WIDTH = 140
+# Costs of wrapping the options of one question, of sending it to a worker process and
+# its result back, and of starting the worker processes. Measured with 40000 questions
+# from benchmarks/generate_bank.py; they decide whether a worker pool is worth starting.
+WRAP_SECONDS = 27e-6
+TRANSFER_SECONDS = 17e-6
+POOL_START_SECONDS = 0.35
+
+
+def add_newline(text, max_length = 80):
+    """Adds line breaks to long text to improve readability in the UI"""
+    words = text.split()
+    if not words:
+        return text
+
+    current_length = 0
+    new_text = []
+
+    # Join words into lines without breaking them
+    for word in words:
+        if current_length + len(word) > max_length:
+            new_text.append('\n')
+            current_length = 0
+        if current_length > 0:
+            new_text.append(' ')
+        new_text.append(word)
+        current_length += len(word) + (1 if current_length > 0 else 0)
+
+    # Handle hyphenated words by ensuring they stay on one line
+    new_text = ''.join(new_text).replace('-\n', '-')
+
+    return new_text
+
+
+def wrap_chunk(chunk, width):
+    """Wrap the options of a list of (question ID, options) pairs.
+    Runs in a worker process for large banks."""
+    return [(qid, tuple(add_newline(option, max_length = width) for option in options)) for qid, options in chunk]
+
+
+def worth_parallel(count, workers):
+    """True if wrapping count questions in workers processes is expected to be faster than
+    wrapping them here. Half of the transfer (pickling the questions, unpickling the results)
+    happens in this process, the other half in the workers."""
+    if workers < 2:
+        return False
+    sequential = count * WRAP_SECONDS
+    parallel = (
+        POOL_START_SECONDS + count * TRANSFER_SECONDS / 2
+        + count * (WRAP_SECONDS + TRANSFER_SECONDS / 2) / workers
+    )
+    return parallel < sequential
+
+
+class DisplayTextLayer:
+    """Answer options with line breaks added for display, per question and wrap width.
+    The texts are computed once, in bulk when the bank is loaded or on first use,
+    and kept next to the questions. The raw option texts in the questions are not
+    changed, so grading never sees the display texts."""
+
+    def __init__(self, options=None):
+        self.options = options if options is not None else {}  # (question ID, width) -> tuple of texts
+
+    def build(self, questions, width=OPTION_WRAP_WIDTH):
+        """Wrap the options of all questions that have their options in memory"""
+        pending = [
+            (question['id'], question['options']) for question in questions
+            if 'options' in question and (question['id'], width) not in self.options
+        ]
+        workers = os.cpu_count() or 1
+        if worth_parallel(len(pending), workers):
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+            size = -(-len(pending) // workers)
+            chunks = [pending[i:i + size] for i in range(0, len(pending), size)]
+            # The bank is loaded on a Qt worker thread; forking a process with threads is unsafe
+            context = multiprocessing.get_context('spawn')
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+                results = pool.map(wrap_chunk, chunks, [width] * len(chunks))
+                for result in results:
+                    for qid, wrapped in result:
+                        self.options[(qid, width)] = wrapped
+        else:
+            for qid, wrapped in wrap_chunk(pending, width):
+                self.options[(qid, width)] = wrapped
+
+    def wrapped_options(self, question, width=OPTION_WRAP_WIDTH):
+        """Return the display texts of a question's options, wrapping them if necessary"""
+        key = (question['id'], width)
+        wrapped = self.options.get(key)
+        if wrapped is None:
+            wrapped = tuple(add_newline(option, max_length = width) for option in question['options'])
+            self.options[key] = wrapped
+        return wrapped
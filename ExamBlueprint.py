@@ -0,0 +1,126 @@
+import json
+import random
+
+# What happens when a category has fewer questions than the blueprint asks for:
+# 'shrink' takes all of them and the exam gets shorter, 'redistribute' asks the
+# missing questions from the other categories of the blueprint, 'error' refuses.
+FALLBACKS = ('shrink', 'redistribute', 'error')
+
+
+def check_count(name, value):
+    """Raise ValueError unless value is a whole number of questions"""
+    if isinstance(value, bool) or not isinstance(value, int) or value < 0:
+        raise ValueError(f"{name} must be a whole number of questions, not {value!r}")
+
+
+def distribute(total, weights):
+    """Split total into whole numbers proportional to weights (largest remainder method)"""
+    weight_sum = sum(weights)
+    if weight_sum <= 0:
+        return [0] * len(weights)
+    shares = [total * weight / weight_sum for weight in weights]
+    counts = [int(share) for share in shares]
+    by_remainder = sorted(range(len(shares)), key=lambda i: shares[i] - counts[i], reverse=True)
+    for i in by_remainder[:total - sum(counts)]:
+        counts[i] += 1
+    return counts
+
+
+class ExamBlueprint:
+    """Says how many questions an exam takes from which category or subcategory.
+
+    The numbers are given directly in counts, or as weights that share total questions.
+    Without either, every category of the bank gets default_count questions. With a seed,
+    the same bank always gives the same exam. fallback is one of FALLBACKS."""
+
+    def __init__(self, counts=None, weights=None, total=None, default_count=1, seed=None, fallback='shrink'):
+        if fallback not in FALLBACKS:
+            raise ValueError(f"Unknown fallback {fallback!r}, expected one of {FALLBACKS}")
+        for name, value in (('counts', counts), ('weights', weights)):
+            if value is not None and not isinstance(value, dict):
+                raise ValueError(f"{name} must map categories to numbers, not {value!r}")
+        if counts and weights:
+            raise ValueError("A blueprint has either counts or weights, not both")
+        if weights and total is None:
+            raise ValueError("Weights need the total number of questions")
+        if seed is not None and (isinstance(seed, bool) or not isinstance(seed, (int, str))):
+            raise ValueError(f"seed must be a whole number or a text, not {seed!r}")
+        for key, count in (counts or {}).items():
+            check_count(repr(key), count)
+        for key, weight in (weights or {}).items():
+            if isinstance(weight, bool) or not isinstance(weight, (int, float)) or weight < 0:
+                raise ValueError(f"Weight of {key!r} must be a number of at least 0, not {weight!r}")
+        if total is not None:
+            check_count('total', total)
+        check_count('default_count', default_count)
+        self.counts = counts or {}    # category or subcategory -> number of questions
+        self.weights = weights or {}  # category or subcategory -> share of total
+        self.total = total
+        self.default_count = default_count
+        self.seed = seed
+        self.fallback = fallback
+        # (category or subcategory, wanted, available) for every part the last exam was short of
+        self.shortfall = []
+
+    @classmethod
+    def from_file(cls, path):
+        """Read a blueprint from a JSON file, e.g.
+        {"counts": {"Programmiersprachen": 5, "R": 2}, "seed": 42, "fallback": "redistribute"}"""
+        with open(path, encoding='utf-8') as file:
+            data = json.load(file)
+        if not isinstance(data, dict):
+            raise ValueError("A blueprint must be a JSON object")
+        return cls(
+            data.get('counts'), data.get('weights'), data.get('total'),
+            data.get('default_count', 1), data.get('seed'), data.get('fallback', 'shrink')
+        )
+
+    def strata(self, bank):
+        """(category or subcategory, number of questions) for every part of the exam"""
+        if self.counts:
+            return list(self.counts.items())
+        if self.weights:
+            return list(zip(self.weights, distribute(self.total, list(self.weights.values()))))
+        return [(category, self.default_count) for category in bank.categories()]
+
+    def fit(self, strata, sizes):
+        """Number of questions to take from each stratum, given the size of its pool.
+        The strata that have too few questions are kept in self.shortfall."""
+        counts = [min(wanted, size) for (_, wanted), size in zip(strata, sizes)]
+        short = [(key, wanted, size) for (key, wanted), size in zip(strata, sizes) if wanted > size]
+        self.shortfall = short
+        if not short:
+            return counts
+        if self.fallback == 'error':
+            key, wanted, size = short[0]
+            raise ValueError(f"{key!r} has only {size} questions, the exam needs {wanted}")
+        if self.fallback == 'redistribute':
+            missing = sum(wanted - size for _, wanted, size in short)
+            # Hand the missing questions out one at a time to the strata with questions left
+            while missing:
+                spare = [i for i, size in enumerate(sizes) if counts[i] < size]
+                if not spare:
+                    break
+                for i in spare[:missing]:
+                    counts[i] += 1
+                missing -= min(missing, len(spare))
+        return counts
+
+    def sample(self, bank, rng=None):
+        """Draw the questions of an exam from the bank's indexes.
+        A question that belongs to two strata, e.g. a category and one of its
+        subcategories, is only asked once."""
+        if self.seed is not None:
+            rng = random.Random(self.seed)
+        elif rng is None:
+            rng = random.Random()
+        strata = self.strata(bank)
+        counts = self.fit(strata, [bank.pool_size(key) for key, _ in strata])
+        questions = []
+        seen = set()
+        for (key, _), count in zip(strata, counts):
+            for question in bank.sample(key, count, rng):
+                if question['id'] not in seen:
+                    seen.add(question['id'])
+                    questions.append(question)
+        return questions
@@ -0,0 +1,89 @@
+# Percentage of correct answers needed to pass a category
+PASS_PERCENTAGE = 75
+
+
+class CategoryResult:
+    """Result of one category of an exam"""
+
+    def __init__(self, category):
+        self.category = category
+        self.total = 0
+        self.score = 0
+        self.wrong = []  # IDs of wrongly answered or unanswered questions
+
+    @property
+    def percentage(self):
+        return (self.score / self.total) * 100 if self.total else 0.0
+
+    @property
+    def passed(self):
+        return self.percentage >= PASS_PERCENTAGE
+
+
+class ExamReport:
+    """Results of an exam, grouped by category"""
+
+    def __init__(self):
+        self.categories = {}  # category -> CategoryResult, in the order of the questions
+        self.answers = []     # (question ID, selected option, correct) of every answered question
+
+    @classmethod
+    def grade(cls, questions, user_answers):
+        """Grade all questions in a single pass. Unanswered questions count as wrong."""
+        report = cls()
+        for question in questions:
+            qid = question['id']
+            result = report.categories.get(question['category'])
+            if result is None:
+                result = report.categories[question['category']] = CategoryResult(question['category'])
+            result.total += 1
+            answer = user_answers.get(qid)
+            if answer is None:
+                result.wrong.append(qid)
+                continue
+            # Both are option positions, resolved when the questions were loaded
+            answer_true = answer['selected'] == answer['correct']
+            report.answers.append((qid, answer['selected'], answer_true))
+            if answer_true:
+                result.score += 1
+            else:
+                result.wrong.append(qid)
+        return report
+
+    @property
+    def passed(self):
+        """The exam is passed if every category is passed"""
+        return all(result.passed for result in self.categories.values())
+
+    @property
+    def score(self):
+        """Number of correctly answered questions in all categories"""
+        return sum(result.score for result in self.categories.values())
+
+    @property
+    def total(self):
+        return sum(result.total for result in self.categories.values())
+
+    @property
+    def percentage(self):
+        return (self.score / self.total) * 100 if self.total else 0.0
+
+    @property
+    def wrong(self):
+        """IDs of all wrongly answered or unanswered questions"""
+        return [qid for result in self.categories.values() for qid in result.wrong]
+
+    def summary(self):
+        """Text for the result dialog, one line per category"""
+        if self.passed:
+            endtext = "Prüfung erfolgreich abgeschlossen! \nHerzlichen Glückwunsch!"
+        else:
+            endtext = "Prüfung leider nicht bestanden. \nBeim nächsten Mal klappt's bestimmt besser!"
+        lines = [endtext, ""]
+        for result in self.categories.values():
+            status = "bestanden" if result.passed else "nicht bestanden"
+            lines.append(
+                f"{result.category}: {result.score}/{result.total} "
+                f"({result.percentage:.1f}%) - {status}"
+            )
+        return "\n".join(lines)
@@ -0,0 +1,119 @@
+from collections import OrderedDict
+from PyQt6.QtCore import Qt, QObject, QRunnable, QThreadPool, pyqtSignal
+from PyQt6.QtGui import QPixmap, QImage, QImageReader, QImageIOHandler
+
+
+def decode_scaled(path, max_width, max_height):
+    """Decode an image directly at the size that fits into max_width x max_height,
+    keeping its aspect ratio. Formats like JPEG then skip most of the full-size work.
+    Returns a null QImage if the image could not be read. Safe to call from any thread."""
+    reader = QImageReader(path)
+    reader.setAutoTransform(True)
+    size = reader.size()
+    if size.isValid():
+        # The size is that of the stored image; a rotation from its EXIF data is applied
+        # after scaling, so a rotated image has to fit into the box turned by 90 degrees
+        if reader.transformation() & QImageIOHandler.Transformation.TransformationRotate90:
+            max_width, max_height = max_height, max_width
+        size.scale(max_width, max_height, Qt.AspectRatioMode.KeepAspectRatio)
+        reader.setScaledSize(size)
+    image = reader.read()
+    if not image.isNull() and not size.isValid():
+        # The format does not tell its size up front, scale after decoding
+        image = image.scaled(max_width, max_height, Qt.AspectRatioMode.KeepAspectRatio)
+    return image
+
+
+class DecodeTask(QRunnable):
+    """Decodes one image on a thread of the pool and hands it to the loader"""
+
+    def __init__(self, loader, key):
+        super().__init__()
+        self.loader = loader
+        self.key = key
+
+    def run(self):
+        image = decode_scaled(*self.key)
+        # The loader lives in the GUI thread, so this is delivered there
+        self.loader.decoded.emit(self.key, image)
+
+
+class ImageCache:
+    """Least recently used cache of scaled pixmaps, keyed by image path and target size.
+    The cache is bounded by the memory its pixmaps need; the least recently shown
+    pixmaps are dropped first."""
+
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.used_bytes = 0
+        self.pixmaps = OrderedDict()  # (path, width, height) -> QPixmap
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def size_of(pixmap):
+        return pixmap.width() * pixmap.height() * pixmap.depth() // 8
+
+    def get(self, key):
+        """Return the cached pixmap for key, or None"""
+        pixmap = self.pixmaps.get(key)
+        if pixmap is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.pixmaps.move_to_end(key)
+        return pixmap
+
+    def put(self, key, pixmap):
+        """Add a pixmap and drop the least recently used ones until the cache fits its limit"""
+        if key in self.pixmaps:
+            self.used_bytes -= self.size_of(self.pixmaps.pop(key))
+        self.pixmaps[key] = pixmap
+        self.used_bytes += self.size_of(pixmap)
+        # Always keep the newest pixmap, even if it alone is larger than the limit
+        while self.used_bytes > self.max_bytes and len(self.pixmaps) > 1:
+            _, dropped = self.pixmaps.popitem(last=False)
+            self.used_bytes -= self.size_of(dropped)
+
+    def clear(self):
+        self.pixmaps.clear()
+        self.used_bytes = 0
+
+
+class ImageLoader(QObject):
+    """Loads scaled question images on a thread pool and caches them.
+    request() returns a cached pixmap right away; otherwise it starts decoding and
+    image_ready or image_failed is emitted in the GUI thread once the image is done."""
+
+    # (path, width, height) and the finished pixmap
+    image_ready = pyqtSignal(object, QPixmap)
+    image_failed = pyqtSignal(object)
+    # Emitted by the decode tasks, from the pool threads
+    decoded = pyqtSignal(object, QImage)
+
+    def __init__(self, cache=None, max_threads=2, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.cache = cache or ImageCache()
+        self.pending = set()
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max_threads)
+        self.decoded.connect(self.on_decoded)
+
+    def request(self, path, max_width, max_height):
+        """Return the cached pixmap, or None and decode the image in the background"""
+        key = (path, max_width, max_height)
+        pixmap = self.cache.get(key)
+        if pixmap is None and key not in self.pending:
+            self.pending.add(key)
+            self.pool.start(DecodeTask(self, key))
+        return pixmap
+
+    def on_decoded(self, key, image):
+        """Turn a decoded image into a pixmap; this has to happen in the GUI thread"""
+        self.pending.discard(key)
+        if image.isNull():
+            self.image_failed.emit(key)
+            return
+        pixmap = QPixmap.fromImage(image)
+        self.cache.put(key, pixmap)
+        self.image_ready.emit(key, pixmap)
@@ -0,0 +1,56 @@
+class PreparedQuestion:
+    """Everything show_question needs to display one question"""
+
+    def __init__(self, question, header, text, options, image):
+        self.question = question  # full question dictionary
+        self.header = header      # category line
+        self.text = text          # question text as displayed
+        self.options = options    # option texts as displayed
+        self.image = image        # image key for the ImageLoader, or None
+
+
+class LookAhead:
+    """Prepares questions before they are shown.
+    While one question is on screen, its neighbours are prepared with the prepare
+    function, so moving to them only has to swap in the prepared content.
+    hits counts questions that were ready when shown, misses those that were not."""
+
+    def __init__(self, prepare):
+        self.prepare = prepare
+        self.prepared = {}  # question ID -> PreparedQuestion
+        self.hits = 0
+        self.misses = 0
+
+    def take(self, entry):
+        """Return the prepared question for entry, preparing it now if necessary"""
+        prepared = self.prepared.get(entry['id'])
+        if prepared is not None:
+            self.hits += 1
+            return prepared
+        self.misses += 1
+        prepared = self.prepare(entry)
+        self.prepared[entry['id']] = prepared
+        return prepared
+
+    def prepare_around(self, questions, index):
+        """Prepare the questions before and after index, and forget all others"""
+        window = [questions[i] for i in (index - 1, index, index + 1) if 0 <= i < len(questions)]
+        keep = {entry['id'] for entry in window}
+        for qid in [qid for qid in self.prepared if qid not in keep]:
+            del self.prepared[qid]
+        for entry in window:
+            if entry['id'] not in self.prepared:
+                self.prepared[entry['id']] = self.prepare(entry)
+
+    def clear(self):
+        """Forget all prepared questions, e.g. when a new quiz starts"""
+        self.prepared.clear()
+
+    def stats(self):
+        """Hit and miss counters, and the share of questions that were ready in time"""
+        shown = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / shown if shown else 0.0,
+        }
@@ -0,0 +1,113 @@
+import json
+import os
+import threading
+
+
+class MarkJournal:
+    """Append-only journal of mark changes, stored next to the question file.
+    Every line records the new state of one question. When loading, the lines are
+    folded into one state per question, the last line for a question wins."""
+
+    # Seconds to wait for further toggles before writing them as one batch
+    FLUSH_DELAY = 0.5
+    # Compact once the journal holds this many lines more than questions
+    COMPACT_THRESHOLD = 200
+    # Name of the value in each line; journals of other per-question states change it
+    FIELD = 'marked'
+
+    def __init__(self, path):
+        self.path = path
+        self.state = {}    # key -> marked, as folded from the journal
+        self.pending = {}  # key -> marked, not yet written
+        self.lines = 0
+        self.lock = threading.RLock()
+        self.timer = None
+
+    def load(self):
+        """Fold the journal into one state per key and return it"""
+        torn = False
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                        self.state[record['key']] = record[self.FIELD]
+                    except (json.JSONDecodeError, KeyError, TypeError):
+                        # A write interrupted by a crash, or a line of the wrong shape, ignore it
+                        torn = True
+                        continue
+                    if not line.endswith('\n'):
+                        torn = True
+                    self.lines += 1
+        except FileNotFoundError:
+            return self.state
+        if torn:
+            # Rewrite the journal so new lines are not appended to a broken one
+            self.compact()
+        elif self.needs_compaction():
+            self.compact_in_background()
+        return self.state
+
+    def record(self, key, marked):
+        """Remember a new mark state. Quick successive toggles are written as one batch."""
+        with self.lock:
+            self.state[key] = marked
+            self.pending[key] = marked
+            if self.timer is None:
+                self.timer = threading.Timer(self.FLUSH_DELAY, self.flush)
+                self.timer.daemon = True
+                self.timer.start()
+
+    def forget(self, keys):
+        """Drop the states of keys, e.g. of questions that were removed from the bank.
+        The journal is rewritten without them."""
+        with self.lock:
+            for key in keys:
+                self.state.pop(key, None)
+                self.pending.pop(key, None)
+        self.compact_in_background()
+
+    def flush(self):
+        """Append all pending changes to the journal with a single write"""
+        with self.lock:
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+            if not self.pending:
+                return
+            data = ''.join(
+                json.dumps({'key': key, self.FIELD: marked}, ensure_ascii=False) + '\n'
+                for key, marked in self.pending.items()
+            )
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            self.lines += len(self.pending)
+            self.pending.clear()
+            if self.needs_compaction():
+                self.compact_in_background()
+
+    def needs_compaction(self):
+        return self.lines > len(self.state) + self.COMPACT_THRESHOLD
+
+    def compact(self):
+        """Replace the journal by one line per key. The new file is written next
+        to the journal and swapped in, so a crash leaves either the old or the new file."""
+        with self.lock:
+            # Changes that are not written yet go into the compacted file as well
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+            self.pending.clear()
+            temp_path = self.path + '.tmp'
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                for key, marked in self.state.items():
+                    f.write(json.dumps({'key': key, self.FIELD: marked}, ensure_ascii=False) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, self.path)
+            self.lines = len(self.state)
+
+    def compact_in_background(self):
+        threading.Thread(target=self.compact, daemon=True).start()
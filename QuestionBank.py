@@ -0,0 +1,605 @@
+import sys
+import json
+import os
+import mmap
+import time
+import pickle
+import hashlib
+from MarkJournal import MarkJournal
+from DataPaths import user_cache_dir, unpacked, state_path
+from AnswerHistory import AnswerHistory
+from DisplayText import DisplayTextLayer, OPTION_WRAP_WIDTH
+
+
+def question_id(entry):
+    """Stable ID of a question, derived from a hash of its content"""
+    content = json.dumps(
+        [entry.get('question'), entry.get('options'), entry.get('correct'),
+         entry.get('category'), entry.get('subcategory')],
+        ensure_ascii=False
+    )
+    return hashlib.sha1(content.encode('utf-8')).hexdigest()[:12]
+
+
+def unique_id(base, seen):
+    """Add a numbered suffix to base until it is not in seen"""
+    qid = base
+    n = 1
+    while qid in seen:
+        n += 1
+        qid = f"{base}-{n}"
+    seen.add(qid)
+    return qid
+
+
+def fuzzy_correct_indexes(questions):
+    """Find the correct option of questions whose 'correct' text is not one of the options,
+    as in older question files. The option closest to 'correct' by Levenshtein distance
+    is taken; if several options are equally close, no option counts as correct."""
+    # Only needed for such files, so the module is not loaded otherwise
+    import Levenshtein
+    indexes = []
+    for question in questions:
+        distances = [Levenshtein.distance(question.get('correct') or "", option) for option in question['options']]
+        best = min(distances, default=None)
+        indexes.append(distances.index(best) if distances.count(best) == 1 else None)
+    return indexes
+
+
+def exact_correct_index(question):
+    """Position of the 'correct' text in the options, or None if it is not one of them"""
+    try:
+        return question['options'].index(question.get('correct'))
+    except ValueError:
+        return None
+
+
+def resolve_correct_indexes(questions):
+    """Store the position of the correct option as 'correct_index' in every question,
+    so answers can be graded by comparing option positions"""
+    unresolved = []
+    for question in questions:
+        if 'correct_index' in question:
+            continue
+        question['correct_index'] = exact_correct_index(question)
+        if question['correct_index'] is None:
+            unresolved.append(question)
+    if unresolved:
+        for question, index in zip(unresolved, fuzzy_correct_indexes(unresolved)):
+            question['correct_index'] = index
+
+
+# Fields of a JSON Lines question that are kept in memory and in the offset index
+INDEX_FIELDS = ('id', 'category', 'subcategory', 'marked', 'correct_index', 'offset')
+# Increase when INDEX_FIELDS change, so old offset indexes are rebuilt
+INDEX_VERSION = 2
+
+
+def build_offset_index(path):
+    """Read a JSON Lines question file once and return the metadata of every question,
+    including the byte offset where its line starts"""
+    entries = []
+    unresolved = []
+    seen = set()
+    offset = 0
+    with open(path, 'rb') as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                qid = record.get('id')
+                if qid is None:
+                    qid = unique_id(question_id(record), seen)
+                else:
+                    seen.add(qid)
+                entry = {
+                    'id': qid,
+                    'category': record.get('category'),
+                    'subcategory': record.get('subcategory'),
+                    'marked': record.get('marked', False),
+                    'correct_index': exact_correct_index(record),
+                    'offset': offset,
+                }
+                if entry['correct_index'] is None:
+                    unresolved.append((entry, record))
+                entries.append(entry)
+            offset += len(line)
+    if unresolved:
+        indexes = fuzzy_correct_indexes([record for entry, record in unresolved])
+        for (entry, record), index in zip(unresolved, indexes):
+            entry['correct_index'] = index
+    return entries
+
+
+def load_offset_index(path):
+    """Return the metadata from the sidecar index of a JSON Lines question file.
+    The index is rebuilt when it is missing or older than the question file."""
+    index_path = path + '.idx'
+    stat = os.stat(path)
+    try:
+        with open(index_path, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+        if (index.get('version') == INDEX_VERSION
+                and index['size'] == stat.st_size and index['mtime'] == stat.st_mtime_ns):
+            return [dict(zip(INDEX_FIELDS, row)) for row in index['entries']]
+    except (FileNotFoundError, json.JSONDecodeError, KeyError):
+        pass
+
+    entries = build_offset_index(path)
+    index = {
+        'version': INDEX_VERSION,
+        'size': stat.st_size,
+        'mtime': stat.st_mtime_ns,
+        'entries': [[entry[field] for field in INDEX_FIELDS] for entry in entries],
+    }
+    temp_path = index_path + '.tmp'
+    try:
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(index, f, ensure_ascii=False)
+        os.replace(temp_path, index_path)
+    except OSError:
+        # A read-only data folder only costs the index scan on the next start
+        pass
+    return entries
+
+
+def assign_ids(questions):
+    """Give every question without an 'id' one generated from its content.
+    Questions with identical content get a numbered suffix to keep the IDs unique."""
+    seen = {entry['id'] for entry in questions if 'id' in entry}
+    for entry in questions:
+        if 'id' not in entry:
+            entry['id'] = unique_id(question_id(entry), seen)
+
+
+# Endings of the files that are loaded when the questions are in a folder
+SHARD_ENDINGS = ('.json', '.jsonl')
+
+
+def load_shard(path):
+    """Parse one question file and return its questions and the seconds it took.
+    Runs in a worker process when a folder with several files is loaded."""
+    start = time.perf_counter()
+    if path.endswith('.jsonl'):
+        questions = load_offset_index(path)
+    else:
+        with open(path, 'r', encoding='utf-8') as f:
+            questions = json.load(f)
+        assign_ids(questions)
+        resolve_correct_indexes(questions)
+    return questions, time.perf_counter() - start
+
+
+def map_file(path):
+    """Map a file into memory for reading, or return None for an empty file"""
+    if os.path.getsize(path) == 0:
+        return None
+    with open(path, 'rb') as f:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+# Increase when the layout of the compiled cache changes, so old caches are rebuilt
+CACHE_VERSION = 3
+
+
+def file_hash(path):
+    """SHA-256 of the content of a file"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def cache_file(path):
+    """Place of the compiled cache in the user cache folder. Caches are unpickled when
+    they are read, so they are never taken from a folder other users can write to, like
+    the questions folder. The name holds a hash of where the questions are, so banks
+    with the same file name don't share a cache."""
+    location = os.path.abspath(path)
+    if unpacked(path):
+        # The unpacked folder gets a new name at every start
+        location = 'bundle:' + os.path.relpath(location, sys._MEIPASS)
+    digest = hashlib.sha256(location.encode('utf-8')).hexdigest()[:16]
+    name = f"{os.path.basename(os.path.normpath(path))}-{digest}.cache"
+    return os.path.join(user_cache_dir(), name)
+
+
+def file_mtime(path):
+    """Modification time of a question file as the cache compares it. Files unpacked by a
+    onefile build get a new mtime at every start, so the time of the exe is used instead."""
+    if unpacked(path):
+        return os.stat(sys.executable).st_mtime_ns
+    return os.stat(path).st_mtime_ns
+
+
+def read_mtimes(cache_path):
+    """mtimes of question files that were touched after the cache was written, by file name"""
+    try:
+        with open(cache_path + '.mtimes', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def read_cache(path, shards):
+    """Return the compiled cache of the question files, or None if there is no valid one.
+    A cache is valid when every file still has the same size and either the same mtime
+    or, if it was only touched or copied, the same content hash. The new mtimes of
+    touched files are kept in a small file next to the cache, so the next start does
+    not hash them again and the cache itself is not rewritten."""
+    cache_path = cache_file(path)
+    try:
+        with open(cache_path, 'rb') as f:
+            data = pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception:
+        # A damaged or outdated cache is simply rebuilt
+        return None
+    if data.get('version') != CACHE_VERSION:
+        return None
+    if [key['name'] for key in data['shards']] != [os.path.basename(shard) for shard in shards]:
+        return None
+
+    mtimes = read_mtimes(cache_path)
+    touched = False
+    for key, shard in zip(data['shards'], shards):
+        if os.stat(shard).st_size != key['size']:
+            return None
+        mtime = file_mtime(shard)
+        if mtime != mtimes.get(key['name'], key['mtime']):
+            if file_hash(shard) != key['hash']:
+                return None
+            mtimes[key['name']] = mtime
+            touched = True
+    if touched:
+        try:
+            with open(cache_path + '.mtimes', 'w', encoding='utf-8') as f:
+                json.dump(mtimes, f)
+        except OSError:
+            pass
+    return data
+
+
+def write_cache_file(cache_path, data):
+    """Write the cache to a temporary file and swap it in. Returns False if that failed."""
+    temp_path = cache_path + '.tmp'
+    try:
+        os.makedirs(os.path.dirname(cache_path) or '.', exist_ok=True)
+        with open(temp_path, 'wb') as f:
+            pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, cache_path)
+    except OSError:
+        return False
+    return True
+
+
+def write_cache(path, shards, bank):
+    """Compile the parsed questions and their indexes into the cache.
+    Returns the path of the written cache, or None if it could not be written."""
+    data = {
+        'version': CACHE_VERSION,
+        'shards': [
+            {
+                'name': os.path.basename(shard),
+                'size': os.stat(shard).st_size,
+                'mtime': file_mtime(shard),
+                'hash': file_hash(shard),
+            }
+            for shard in shards
+        ],
+        'questions': bank.questions,
+        'by_category': bank.by_category,
+        'by_subcategory': bank.by_subcategory,
+        'by_id': bank.by_id,
+        'duplicates': bank.duplicates,
+        'display_texts': bank.display_texts.options,
+    }
+    cache_path = cache_file(path)
+    if not write_cache_file(cache_path, data):
+        return None
+    try:
+        # The mtimes of the old cache don't apply to the new one
+        os.remove(cache_path + '.mtimes')
+    except OSError:
+        pass
+    return cache_path
+
+
+def list_shards(path):
+    """Return the question files of path: the file itself, or all question files of a folder"""
+    if os.path.isdir(path):
+        return sorted(
+            os.path.join(path, name) for name in os.listdir(path)
+            if name.endswith(SHARD_ENDINGS)
+        )
+    return [path]
+
+
+class QuestionBank:
+    """Holds all questions of the question file in memory.
+    The file is parsed once; categories, subcategories and marked questions
+    are looked up through dictionaries built while loading.
+    Every question carries an 'id'; questions without one get an ID from a content hash.
+    While loading, the position of the correct option is stored as 'correct_index'.
+    Marks are not written into the question file, but into a journal next to it.
+    Graded answers are kept in an answer history next to it (see AnswerHistory.py).
+
+    The question file is either one JSON array, or a JSON Lines file (.jsonl) with one
+    question per line. For JSON Lines files only the metadata of each question
+    (id, category, subcategory, marked, offset) is held in memory; use body() to get
+    the question text, options and image.
+
+    path can also be a folder. Every .json and .jsonl file in it is one shard of the
+    bank, e.g. one file per category. The shards are parsed in parallel and merged.
+
+    The parsed questions and indexes are kept in a compiled cache (see read_cache),
+    so later starts only have to read the cache. The cache also holds the options
+    wrapped for display (see DisplayText.py)."""
+
+    def __init__(self, path, questions, journal=None, mapped=None, indexes=None):
+        self.path = path
+        self.questions = questions
+        # Memory-mapped JSON Lines files, one per shard (None for JSON arrays)
+        self.mapped = mapped or []
+        self.shard_times = {}
+        self.duplicates = []
+        self.display_texts = DisplayTextLayer()
+        if journal is None:
+            journal = MarkJournal(state_path(path, '.marks'))
+        self.journal = journal
+        if indexes is None:
+            assign_ids(self.questions)
+            resolve_correct_indexes(self.questions)
+            self.apply_marks(self.journal.load())
+            self.build_indexes()
+        else:
+            self.by_category, self.by_subcategory, self.by_id = indexes
+            self.apply_marks(self.journal.load())
+            self.build_marked_index()
+        self.history = AnswerHistory(state_path(path, '.history'), self.category_of)
+
+    @classmethod
+    def load(cls, path, use_cache=True):
+        """Load the question file, or all files of a question folder, with their indexes.
+        The compiled cache is used when it is still valid and rebuilt when it is not."""
+        shards = list_shards(path)
+        if use_cache:
+            data = read_cache(path, shards)
+            if data is not None:
+                bank = cls(
+                    path, data['questions'],
+                    mapped=[map_file(shard) if shard.endswith('.jsonl') else None for shard in shards],
+                    indexes=(data['by_category'], data['by_subcategory'], data['by_id'])
+                )
+                bank.duplicates = data['duplicates']
+                bank.display_texts = DisplayTextLayer(data['display_texts'])
+                return bank
+        bank = cls.parse(path, shards)
+        if use_cache:
+            write_cache(path, shards, bank)
+        return bank
+
+    @classmethod
+    def parse(cls, path, shards):
+        """Parse the question files and build the indexes"""
+        workers = min(len(shards), os.cpu_count() or 1)
+        if workers > 1:
+            # Imported here, as starting the quiz with a single file does not need it
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+            # The bank is loaded on a Qt worker thread; forking a process with threads is unsafe
+            context = multiprocessing.get_context('spawn')
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+                results = list(pool.map(load_shard, shards))
+        else:
+            results = [load_shard(shard) for shard in shards]
+
+        # Merge the shards into one list. IDs must be unique across all shards:
+        # a question whose ID was already used by an earlier shard gets a suffix.
+        questions = []
+        mapped = []
+        owners = {}
+        seen = set()
+        duplicates = []
+        shard_times = {}
+        for number, (shard, (entries, seconds)) in enumerate(zip(shards, results)):
+            shard_times[shard] = seconds
+            for entry in entries:
+                qid = entry['id']
+                if qid in seen:
+                    duplicates.append((qid, owners[qid], shard))
+                    entry['id'] = unique_id(qid, seen)
+                else:
+                    seen.add(qid)
+                owners[entry['id']] = shard
+                if 'offset' in entry:
+                    entry['shard'] = number
+            questions.extend(entries)
+            mapped.append(map_file(shard) if shard.endswith('.jsonl') else None)
+
+        bank = cls(path, questions, mapped=mapped)
+        # Questions of JSON Lines files are wrapped when they are first shown
+        bank.display_texts.build(bank.questions)
+        bank.shard_times = shard_times
+        bank.duplicates = duplicates
+        return bank
+
+    def load_report(self):
+        """Return one line per shard with its load time, followed by the duplicate IDs
+        found while merging. Empty for a single file without duplicates."""
+        if len(self.shard_times) < 2 and not self.duplicates:
+            return []
+        lines = [f"{shard}: {seconds * 1000:.1f} ms" for shard, seconds in self.shard_times.items()]
+        lines.extend(
+            f"Duplicate ID {qid} in {first} and {second}" for qid, first, second in self.duplicates
+        )
+        return lines
+
+    def apply_marks(self, marks):
+        """Fold the mark states from the journal into the questions"""
+        if not marks:
+            return
+        for entry in self.questions:
+            if entry['id'] in marks:
+                entry['marked'] = marks[entry['id']]
+            elif entry.get('question') in marks:
+                # Journals written before questions had IDs are keyed by the question text
+                entry['marked'] = marks[entry.get('question')]
+
+    def build_indexes(self):
+        """Build the lookup dictionaries. Every index maps to positions in self.questions."""
+        self.by_category = {}
+        self.by_subcategory = {}
+        self.by_id = {}
+        for i, entry in enumerate(self.questions):
+            self.by_category.setdefault(entry.get('category'), []).append(i)
+            self.by_subcategory.setdefault(entry.get('subcategory'), []).append(i)
+            self.by_id[entry['id']] = i
+        self.build_marked_index()
+
+    def build_marked_index(self):
+        """Build the dictionary of marked questions, keyed by position in self.questions"""
+        self.marked = {}
+        for i, entry in enumerate(self.questions):
+            if entry.get('marked', False):
+                self.marked[i] = entry
+
+    def categories(self):
+        """Return a new list with all categories"""
+        return list(self.by_category)
+
+    def subcategories(self):
+        """Return a new list with all subcategories"""
+        return list(self.by_subcategory)
+
+    def select(self, keys):
+        """Return all questions whose category or subcategory is one of keys, in file order"""
+        positions = set()
+        for key in keys:
+            positions.update(self.by_category.get(key, ()))
+            positions.update(self.by_subcategory.get(key, ()))
+        return [self.questions[i] for i in sorted(positions)]
+
+    def positions(self, key):
+        """Index list of a category, or of a subcategory if there is no category named key"""
+        positions = self.by_category.get(key)
+        if positions is None:
+            positions = self.by_subcategory.get(key, [])
+        return positions
+
+    def pool_size(self, key):
+        """Number of questions in a category or subcategory"""
+        return len(self.positions(key))
+
+    def sample(self, key, count, rng):
+        """count random questions of a category or subcategory, in random order.
+        They are drawn from positions in the index, so this takes O(count), not O(pool)."""
+        positions = self.positions(key)
+        return [self.questions[positions[i]] for i in rng.sample(range(len(positions)), count)]
+
+    def get(self, question_id):
+        """Return the question with the given ID"""
+        return self.questions[self.by_id[question_id]]
+
+    def has_question(self, question_id):
+        """Check if a question with the given ID is in the bank"""
+        return question_id in self.by_id
+
+    def category_of(self, question_id):
+        """Category of the question with the given ID, or None if it is not in the bank"""
+        i = self.by_id.get(question_id)
+        return None if i is None else self.questions[i].get('category')
+
+    def body(self, entry):
+        """Return the full question for an entry of self.questions.
+        For JSON Lines files the line is read from the memory-mapped file."""
+        if 'offset' not in entry:
+            return entry
+        mapped = self.mapped[entry['shard']]
+        end = mapped.find(b'\n', entry['offset'])
+        if end == -1:
+            end = len(mapped)
+        record = json.loads(mapped[entry['offset']:end])
+        # The metadata in memory is more recent, e.g. for the 'marked' flag
+        record.update(entry)
+        return record
+
+    def marked_questions(self):
+        """Return all marked questions, in file order"""
+        return [self.marked[i] for i in sorted(self.marked)]
+
+    def toggle_mark(self, question_id):
+        """Flip the 'marked' flag of a question and record it in the journal. Returns the new state."""
+        i = self.by_id[question_id]
+        entry = self.questions[i]
+        entry['marked'] = not entry.get('marked', False)
+        if entry['marked']:
+            self.marked[i] = entry
+        else:
+            self.marked.pop(i, None)
+        self.journal.record(question_id, entry['marked'])
+        return entry['marked']
+
+    def display_options(self, question, width=OPTION_WRAP_WIDTH):
+        """Return the options of a full question with line breaks for display"""
+        return self.display_texts.wrapped_options(question, width)
+
+    def record_answers(self, answers):
+        """Add (question ID, selected option, correct) answers to the history with one write"""
+        for question_id, selected, correct in answers:
+            self.history.record(question_id, selected, correct)
+        self.history.flush()
+
+    def answer_statistics(self):
+        """(category, answers, wrong answers, time of the last answer) per category.
+        The numbers are kept up to date with every answer, so this doesn't read the history."""
+        return [
+            (category, stats.attempts, stats.wrong, stats.last_seen)
+            for category, stats in self.history.category_stats.items()
+        ]
+
+    def close(self):
+        """Write marks and answers that are still waiting"""
+        self.journal.flush()
+        self.history.close()
+        for mapped in self.mapped:
+            if mapped is not None:
+                mapped.close()
+        self.mapped = []
+
+
+# Endings of SQLite databases, which are opened with SQLiteBank instead of QuestionBank
+SQLITE_ENDINGS = ('.db', '.sqlite')
+
+
+def open_bank(path):
+    """Open the question storage at path: a SQLite database, or question files"""
+    if path.endswith(SQLITE_ENDINGS):
+        # Imported here, so the JSON storage does not load sqlite3
+        from SQLiteBank import SQLiteBank
+        return SQLiteBank(path)
+    return QuestionBank.load(path)
+
+
+def compile_cache(path):
+    """Parse the questions at path and write the compiled cache. Returns the cache path."""
+    shards = list_shards(path)
+    return write_cache(path, shards, QuestionBank.parse(path, shards))
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(
+        description="Compile the cache of a question file or folder ahead of time."
+    )
+    parser.add_argument(
+        'path', nargs='?', default=os.path.join('questions', 'test.json'),
+        help="question file or folder (default: questions/test.json)"
+    )
+    args = parser.parse_args()
+    start = time.perf_counter()
+    cache_path = compile_cache(args.path)
+    if cache_path is None:
+        sys.exit(f"The cache of {args.path} could not be written")
+    print(f"Compiled {args.path} into {cache_path} in {time.perf_counter() - start:.2f} s")
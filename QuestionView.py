@@ -0,0 +1,138 @@
+from PyQt6.QtCore import Qt, pyqtSignal
+from PyQt6.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
+    QRadioButton, QButtonGroup, QSizePolicy
+)
+
+
+class QuestionView(QWidget):
+    """Shows one question with its image, answer options and navigation buttons.
+    All widgets are created once and only updated when the next question is shown.
+    Option buttons are kept in a pool that only grows when a question has more options
+    than any question before; unused buttons are hidden.
+    The widgets have no stylesheets of their own, they are styled by the application
+    stylesheet from Theme.py through their object names and the 'role' property."""
+
+    # Position of the option the user clicked
+    answer_selected = pyqtSignal(int)
+    previous_clicked = pyqtSignal()
+    mark_clicked = pyqtSignal()
+    next_clicked = pyqtSignal()
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.setLayout(QVBoxLayout())
+
+        self.category_label = QLabel()
+        self.category_label.setObjectName("categoryLabel")
+        self.category_label.setAlignment(Qt.AlignmentFlag.AlignLeft)
+        self.category_label.setWordWrap(True)
+
+        self.question_label = QLabel()
+        self.question_label.setObjectName("questionLabel")
+        self.question_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.question_label.setWordWrap(True)
+
+        self.image_label = QLabel()
+        self.image_label.setObjectName("questionImage")
+        self.image_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.image_label.setSizePolicy(QSizePolicy.Policy.Preferred, QSizePolicy.Policy.Fixed)
+        self.image_label.hide()
+
+        # Pool of option buttons, the ID of a button in the group is its position
+        self.option_layout = QVBoxLayout()
+        self.option_buttons = []
+        self.answer_group = QButtonGroup(self)
+        self.answer_group.setExclusive(True)
+        self.answer_group.setObjectName("radioGroup")
+        self.answer_group.idClicked.connect(self.answer_selected)
+
+        self.create_navigation()
+
+        self.layout().addWidget(self.category_label)
+        self.layout().addWidget(self.question_label)
+        self.layout().addWidget(self.image_label)
+        self.layout().addLayout(self.option_layout)
+        self.layout().addWidget(self.navigation)
+
+    def create_navigation(self):
+        """Create the row with the previous, mark and next buttons"""
+        self.navigation = QWidget()
+        self.navigation.setLayout(QHBoxLayout())
+
+        self.previous_button = QPushButton("Zurück zur vorherigen Frage")
+        self.previous_button.setObjectName("previousButton")
+        self.previous_button.setProperty("role", "navigation")
+        self.previous_button.clicked.connect(self.previous_clicked)
+
+        self.mark_button = QPushButton("Frage markieren")
+        self.mark_button.setObjectName("markButton")
+        self.mark_button.clicked.connect(self.mark_clicked)
+
+        self.next_button = QPushButton("Nächste Frage")
+        self.next_button.setObjectName("nextButton")
+        self.next_button.setProperty("role", "navigation")
+        self.next_button.clicked.connect(self.next_clicked)
+
+        self.navigation.layout().addWidget(self.previous_button)
+        self.navigation.layout().addWidget(self.mark_button)
+        self.navigation.layout().addWidget(self.next_button)
+
+    def create_option_button(self):
+        """Add a new option button to the pool"""
+        button = QRadioButton()
+        button.setProperty("role", "option")
+        self.answer_group.addButton(button, len(self.option_buttons))
+        self.option_buttons.append(button)
+        self.option_layout.addWidget(button)
+        return button
+
+    def set_text(self, category, question):
+        """Show the category line and the question text"""
+        self.category_label.setText(category)
+        self.question_label.setText(question)
+
+    def set_image(self, pixmap):
+        """Show a pixmap below the question, or hide the image if pixmap is None"""
+        if pixmap is None:
+            self.image_label.clear()
+            self.image_label.hide()
+        else:
+            self.image_label.setPixmap(pixmap)
+            self.image_label.show()
+
+    def set_image_loading(self):
+        """Show a placeholder in the image slot while the image is being loaded"""
+        self.image_label.clear()
+        self.image_label.setText("Bild wird geladen …")
+        self.image_label.show()
+
+    def set_options(self, options):
+        """Show one unchecked button per option and hide the remaining buttons of the pool"""
+        while len(self.option_buttons) < len(options):
+            self.create_option_button()
+
+        # An exclusive group does not allow unchecking its checked button
+        self.answer_group.setExclusive(False)
+        for i, button in enumerate(self.option_buttons):
+            button.setChecked(False)
+            if i < len(options):
+                button.setText(options[i])
+                button.show()
+            else:
+                button.hide()
+        self.answer_group.setExclusive(True)
+
+    def select_option(self, index):
+        """Click the option at index, as if the user had clicked it"""
+        self.option_buttons[index].click()
+
+    def set_navigation(self, has_previous, marked, next_text):
+        """Update the navigation row for the current question"""
+        self.previous_button.setVisible(has_previous)
+        self.set_marked(marked)
+        self.next_button.setText(next_text)
+
+    def set_marked(self, marked):
+        """Show whether the current question is marked"""
+        self.mark_button.setText("Frage aus markierten Fragen entfernen" if marked else "Frage markieren")
@@ -0,0 +1,137 @@
+import random
+from Grading import ExamReport
+from ExamBlueprint import ExamBlueprint
+
+
+class QuizSession:
+    """Questions, answers, navigation and grading of one quiz, without any user interface.
+    The Quiz window shows the current question of a session and forwards the user's
+    clicks to it. Scripts and capacity tests can drive a session directly, without Qt."""
+
+    def __init__(self, bank, exam_question_number=1, rng=None, blueprint=None, scheduler=None):
+        self.bank = bank
+        # Spaced repetition state, updated with every graded quiz (see ReviewScheduler.py)
+        self.scheduler = scheduler
+        # Which questions an exam takes; by default exam_question_number from each category
+        self.blueprint = blueprint if blueprint is not None else ExamBlueprint(default_count=exam_question_number)
+        self.random = rng if rng is not None else random.Random()
+        self.questions = []
+        self.current_question = 0
+        self.user_answers = {}     # question ID -> selected and correct option
+        self.wrong_questions = {}  # IDs of wrongly answered questions, in the order they were found
+        self.score = 0
+        self.answer_selected = False
+        self.exam_mode = False
+
+    # Starting a quiz
+
+    def start(self, questions, exam_mode=False):
+        """Start a quiz with the given questions. Returns False if there are none."""
+        self.questions = list(questions)
+        self.exam_mode = exam_mode
+        self.current_question = 0
+        self.score = 0
+        self.wrong_questions.clear()
+        self.user_answers.clear()
+        self.answer_selected = False
+        return bool(self.questions)
+
+    def load_questions(self, categories):
+        """Questions whose category or subcategory is one of the given ones"""
+        return self.bank.select(categories)
+
+    def start_categories(self, categories):
+        """Start a quiz with the questions of the given categories or subcategories"""
+        return self.start(self.load_questions(categories))
+
+    def start_marked(self):
+        """Start a quiz with the marked questions"""
+        return self.start(self.bank.marked_questions())
+
+    def start_exam(self):
+        """Start an exam with random questions drawn as the blueprint says.
+        Raises ValueError if a category is too small and the blueprint's fallback is 'error'."""
+        return self.start(self.blueprint.sample(self.bank, self.random), exam_mode=True)
+
+    def start_review(self, count):
+        """Start a quiz with the count questions that are most urgently due for review"""
+        if self.scheduler is None:
+            return self.start([])
+        # Questions that were removed from the bank are dropped from the schedule
+        due = self.scheduler.most_urgent(count, self.bank.has_question)
+        return self.start([self.bank.get(qid) for qid in due])
+
+    def start_wrong(self):
+        """Start a quiz with the questions answered wrongly in the last one"""
+        return self.start([self.bank.get(qid) for qid in self.wrong_questions])
+
+    # Navigation
+
+    @property
+    def current(self):
+        """Entry of the question that is currently shown"""
+        return self.questions[self.current_question]
+
+    def has_previous(self):
+        return self.current_question > 0
+
+    def is_last(self):
+        return self.current_question >= len(self.questions) - 1
+
+    def answer(self, selected):
+        """Store the answer at position selected for the current question"""
+        question = self.current
+        self.answer_selected = True
+        # Both are option positions, resolved when the questions were loaded
+        self.user_answers[question['id']] = {
+            'selected': selected,
+            'correct': question['correct_index'],
+            'main_category': question['category']
+        }
+
+    def next(self):
+        """Move to the next question. A question left without an answer counts as wrong."""
+        if not self.answer_selected:
+            self.wrong_questions[self.current['id']] = None
+        self.answer_selected = False
+        self.current_question += 1
+
+    def previous(self):
+        """Move to the previous question and return the option selected there, or None"""
+        self.current_question -= 1
+        answer = self.user_answers.get(self.current['id'])
+        return answer['selected'] if answer is not None else None
+
+    def toggle_mark(self):
+        """Mark or unmark the current question in the bank and return the new state"""
+        question = self.current
+        question['marked'] = self.bank.toggle_mark(question['id'])
+        return question['marked']
+
+    # Grading
+
+    def finish(self):
+        """Grade all questions, record the answers in the bank and return the ExamReport.
+        Afterwards wrong_questions holds the wrongly answered or unanswered questions."""
+        report = ExamReport.grade(self.questions, self.user_answers)
+        # All answers of the quiz are written to the history at once
+        self.bank.record_answers(report.answers)
+        if self.scheduler is not None:
+            self.scheduler.record_report(self.questions, report)
+        self.score = report.score
+        wrong = set(report.wrong)
+        self.wrong_questions = dict.fromkeys(
+            question['id'] for question in self.questions if question['id'] in wrong
+        )
+        self.user_answers.clear()
+        return report
+
+    def reset(self):
+        """Forget the current quiz, e.g. when going back to the menu"""
+        self.questions = []
+        self.current_question = 0
+        self.score = 0
+        self.wrong_questions.clear()
+        self.user_answers.clear()
+        self.answer_selected = False
+        self.exam_mode = False
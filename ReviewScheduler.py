@@ -0,0 +1,111 @@
+import time
+import heapq
+from MarkJournal import MarkJournal
+from DataPaths import state_path
+
+# Days until a question in each Leitner box is due again. New questions start in box 1;
+# a correct answer moves a question one box up, a wrong answer back to box 1.
+# Box 0 is not used.
+BOX_DAYS = (0, 0, 1, 3, 7, 14, 30)
+DAY = 24 * 60 * 60
+
+
+class ReviewJournal(MarkJournal):
+    """Journal of review states, one [box, due minute] per question.
+    Written in batches and compacted like the marks."""
+
+    FIELD = 'review'
+
+
+def journal_path(path):
+    """Review journal of a question file, folder or database"""
+    return state_path(path, '.review')
+
+
+def valid_state(value):
+    """True if value is a [box, due minute] pair as written by ReviewScheduler.record"""
+    return (
+        isinstance(value, list) and len(value) == 2
+        and all(isinstance(number, int) and not isinstance(number, bool) for number in value)
+        and 1 <= value[0] < len(BOX_DAYS)
+    )
+
+
+class ReviewScheduler:
+    """Spaced repetition with Leitner boxes.
+    Every graded question gets a box and the time it is due again. The due times are
+    kept in a heap, so the most urgent questions are found in O(N log n) without
+    looking at the whole bank. Updating a question pushes a new heap entry; the old
+    one is recognized as outdated and skipped when it comes up."""
+
+    def __init__(self, journal):
+        self.journal = journal
+        self.state = {}  # question ID -> (box, due time in seconds)
+        broken = []
+        for qid, value in journal.load().items():
+            if valid_state(value):
+                self.state[qid] = (value[0], value[1] * 60)
+            else:
+                broken.append(qid)
+        if broken:
+            # States of the wrong shape, e.g. from an edited journal
+            journal.forget(broken)
+        self.heap = [(due, qid) for qid, (_, due) in self.state.items()]
+        heapq.heapify(self.heap)
+
+    @classmethod
+    def open(cls, path):
+        """Open the review state stored next to the questions at path"""
+        return cls(ReviewJournal(journal_path(path)))
+
+    def record(self, question_id, correct, now=None):
+        """Move a question to its next box after an answer and return its new due time"""
+        now = time.time() if now is None else now
+        box = self.state.get(question_id, (1, 0))[0]
+        box = min(box + 1, len(BOX_DAYS) - 1) if correct else 1
+        # Stored in whole minutes, which keeps the journal short
+        due_minute = int(now + BOX_DAYS[box] * DAY) // 60
+        due = due_minute * 60
+        self.state[question_id] = (box, due)
+        heapq.heappush(self.heap, (due, question_id))
+        self.journal.record(question_id, [box, due_minute])
+        if len(self.heap) > 2 * len(self.state) + 100:
+            # Drop the outdated entries once they make up most of the heap
+            self.heap = [(due, qid) for qid, (_, due) in self.state.items()]
+            heapq.heapify(self.heap)
+        return due
+
+    def record_report(self, questions, report):
+        """Update every graded question of a quiz. Unanswered questions count as wrong, as in grading."""
+        answers = {qid: answer_true for qid, _, answer_true in report.answers}
+        now = time.time()
+        for question in questions:
+            self.record(question['id'], answers.get(question['id'], False), now)
+
+    def most_urgent(self, count, known=None, now=None):
+        """IDs of up to count questions that are due, the longest overdue first.
+        known(question_id) tells whether a question is still in the bank; questions
+        that are not, e.g. because their text and with it their ID changed, are
+        dropped from the schedule and from the journal."""
+        now = time.time() if now is None else now
+        found = []
+        removed = []
+        while self.heap and len(found) < count and self.heap[0][0] <= now:
+            due, qid = heapq.heappop(self.heap)
+            if self.state.get(qid, (None, None))[1] != due or qid in found:
+                continue
+            if known is not None and not known(qid):
+                del self.state[qid]
+                removed.append(qid)
+                continue
+            found.append(qid)
+        if removed:
+            self.journal.forget(removed)
+        # The questions stay scheduled until they are answered
+        for qid in found:
+            heapq.heappush(self.heap, (self.state[qid][1], qid))
+        return found
+
+    def close(self):
+        """Write review states that are still waiting in the journal"""
+        self.journal.flush()
@@ -0,0 +1,356 @@
+import os
+import sys
+import json
+import time
+import sqlite3
+from QuestionBank import QuestionBank, resolve_correct_indexes
+from DisplayText import DisplayTextLayer, OPTION_WRAP_WIDTH
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS categories (
+    id INTEGER PRIMARY KEY,
+    name TEXT,
+    kind TEXT NOT NULL,  -- 'category' or 'subcategory'
+    UNIQUE (kind, name)
+);
+CREATE TABLE IF NOT EXISTS questions (
+    id TEXT PRIMARY KEY,
+    position INTEGER NOT NULL,
+    category_id INTEGER REFERENCES categories(id),
+    subcategory_id INTEGER REFERENCES categories(id),
+    question TEXT NOT NULL,
+    options TEXT NOT NULL,  -- JSON list
+    correct TEXT,
+    correct_index INTEGER,  -- position of the correct option, NULL if none matches
+    image TEXT
+);
+CREATE INDEX IF NOT EXISTS questions_category ON questions (category_id, position);
+CREATE INDEX IF NOT EXISTS questions_subcategory ON questions (subcategory_id, position);
+CREATE INDEX IF NOT EXISTS questions_position ON questions (position);
+CREATE TABLE IF NOT EXISTS marks (
+    question_id TEXT PRIMARY KEY REFERENCES questions(id)
+);
+CREATE TABLE IF NOT EXISTS answers (
+    id INTEGER PRIMARY KEY,
+    question_id TEXT NOT NULL REFERENCES questions(id),
+    selected INTEGER,  -- position of the chosen option
+    correct INTEGER NOT NULL,
+    answered_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS answers_question ON answers (question_id);
+-- Kept up to date with every answer, so statistics don't go through all answers
+CREATE TABLE IF NOT EXISTS question_stats (
+    question_id TEXT PRIMARY KEY REFERENCES questions(id),
+    attempts INTEGER NOT NULL,
+    wrong INTEGER NOT NULL,
+    last_seen REAL NOT NULL
+);
+"""
+
+# Columns of a question, in the order they are turned into a dictionary by to_question
+QUESTION_COLUMNS = """
+    q.id, q.question, q.options, q.correct, q.correct_index, q.image, c.name, s.name,
+    m.question_id IS NOT NULL
+FROM questions q
+LEFT JOIN categories c ON c.id = q.category_id
+LEFT JOIN categories s ON s.id = q.subcategory_id
+LEFT JOIN marks m ON m.question_id = q.id
+"""
+
+
+def to_question(row):
+    """Turn a row selected with QUESTION_COLUMNS into a question dictionary"""
+    qid, question, options, correct, correct_index, image, category, subcategory, marked = row
+    return {
+        'id': qid,
+        'question': question,
+        'options': json.loads(options),
+        'correct': correct,
+        'correct_index': correct_index,
+        'image': image or "",
+        'category': category,
+        'subcategory': subcategory,
+        'marked': bool(marked),
+    }
+
+
+class SQLiteBank:
+    """Question storage in a SQLite database.
+    Offers the same methods as QuestionBank, but every lookup is an indexed query,
+    so nothing has to be held in memory or scanned in Python."""
+
+    def __init__(self, path):
+        self.path = path
+        # The quiz opens the database on its loading thread and then only uses it
+        # on the GUI thread, never from two threads at once
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript(SCHEMA)
+        self.migrate()
+        # Options are wrapped for display when a question is first shown
+        self.display_texts = DisplayTextLayer()
+
+    def migrate(self):
+        """Bring databases created by older versions up to the current schema"""
+        columns = [row[1] for row in self.connection.execute("PRAGMA table_info(questions)")]
+        if 'correct_index' not in columns:
+            with self.connection:
+                self.connection.execute("ALTER TABLE questions ADD COLUMN correct_index INTEGER")
+                rows = self.connection.execute("SELECT id, options, correct FROM questions").fetchall()
+                questions = [
+                    {'id': qid, 'options': json.loads(options), 'correct': correct}
+                    for qid, options, correct in rows
+                ]
+                resolve_correct_indexes(questions)
+                self.connection.executemany(
+                    "UPDATE questions SET correct_index = ? WHERE id = ?",
+                    [(question['correct_index'], question['id']) for question in questions]
+                )
+        has_stats = self.connection.execute("SELECT 1 FROM question_stats LIMIT 1").fetchone()
+        has_answers = self.connection.execute("SELECT 1 FROM answers LIMIT 1").fetchone()
+        if has_answers and not has_stats:
+            # Answers recorded before the statistics were kept
+            with self.connection:
+                self.connection.execute(
+                    """INSERT INTO question_stats (question_id, attempts, wrong, last_seen)
+                    SELECT question_id, count(*), sum(correct = 0), max(answered_at)
+                    FROM answers GROUP BY question_id"""
+                )
+
+    def load_report(self):
+        """A database is a single source, so there is nothing to report"""
+        return []
+
+    def categories(self):
+        """Return a new list with all categories"""
+        return self.names('category')
+
+    def subcategories(self):
+        """Return a new list with all subcategories"""
+        return self.names('subcategory')
+
+    def names(self, kind):
+        rows = self.connection.execute(
+            "SELECT name FROM categories WHERE kind = ? ORDER BY id", (kind,)
+        )
+        return [name for (name,) in rows]
+
+    def is_category(self, key):
+        """Check if key is the name of a main category"""
+        row = self.connection.execute(
+            "SELECT 1 FROM categories WHERE kind = 'category' AND name = ?", (key,)
+        ).fetchone()
+        return row is not None
+
+    def select(self, keys):
+        """Return all questions whose category or subcategory is one of keys, in file order"""
+        keys = json.dumps(list(keys), ensure_ascii=False)
+        rows = self.connection.execute(
+            "SELECT " + QUESTION_COLUMNS + """
+            WHERE q.category_id IN (
+                SELECT id FROM categories WHERE kind = 'category' AND name IN (SELECT value FROM json_each(?))
+            ) OR q.subcategory_id IN (
+                SELECT id FROM categories WHERE kind = 'subcategory' AND name IN (SELECT value FROM json_each(?))
+            )
+            ORDER BY q.position
+            """,
+            (keys, keys)
+        )
+        return [to_question(row) for row in rows]
+
+    def pool(self, key):
+        """Condition selecting the questions of a category, or of a subcategory if there is
+        no category named key. Both are answered from an index."""
+        column, kind = ('category_id', 'category') if self.is_category(key) else ('subcategory_id', 'subcategory')
+        return f"{column} = (SELECT id FROM categories WHERE kind = '{kind}' AND name = ?)"
+
+    def pool_size(self, key):
+        """Number of questions in a category or subcategory"""
+        (count,) = self.connection.execute(
+            "SELECT count(*) FROM questions WHERE " + self.pool(key), (key,)
+        ).fetchone()
+        return count
+
+    def sample(self, key, count, rng):
+        """count random questions of a category or subcategory, in random order.
+        Random ranks in the pool are looked up one by one in the index, so neither the
+        pool nor its positions are loaded; only the chosen questions are."""
+        query = "SELECT position FROM questions WHERE " + self.pool(key) + " ORDER BY position LIMIT 1 OFFSET ?"
+        chosen = [
+            self.connection.execute(query, (key, rank)).fetchone()[0]
+            for rank in rng.sample(range(self.pool_size(key)), count)
+        ]
+        rows = self.connection.execute(
+            "SELECT q.position, " + QUESTION_COLUMNS + " WHERE q.position IN (SELECT value FROM json_each(?))",
+            (json.dumps(chosen),)
+        )
+        by_position = {row[0]: to_question(row[1:]) for row in rows}
+        return [by_position[position] for position in chosen]
+
+    def get(self, question_id):
+        """Return the question with the given ID"""
+        row = self.connection.execute(
+            "SELECT " + QUESTION_COLUMNS + " WHERE q.id = ?", (question_id,)
+        ).fetchone()
+        if row is None:
+            raise KeyError(question_id)
+        return to_question(row)
+
+    def has_question(self, question_id):
+        """Check if a question with the given ID is in the database"""
+        row = self.connection.execute("SELECT 1 FROM questions WHERE id = ?", (question_id,)).fetchone()
+        return row is not None
+
+    def body(self, entry):
+        """Questions from the database are always complete"""
+        return entry
+
+    def display_options(self, question, width=OPTION_WRAP_WIDTH):
+        """Return the options of a question with line breaks for display"""
+        return self.display_texts.wrapped_options(question, width)
+
+    def marked_questions(self):
+        """Return all marked questions, in file order"""
+        rows = self.connection.execute(
+            "SELECT " + QUESTION_COLUMNS.replace("LEFT JOIN marks", "JOIN marks") + " ORDER BY q.position"
+        )
+        return [to_question(row) for row in rows]
+
+    def toggle_mark(self, question_id):
+        """Flip the mark of a question. Returns the new state."""
+        with self.connection:
+            removed = self.connection.execute(
+                "DELETE FROM marks WHERE question_id = ?", (question_id,)
+            ).rowcount
+            if not removed:
+                self.connection.execute(
+                    "INSERT INTO marks (question_id) VALUES (?)", (question_id,)
+                )
+        return not removed
+
+    def record_answers(self, answers):
+        """Add (question ID, selected option, correct) answers to the history in one transaction"""
+        now = time.time()
+        rows = [(question_id, selected, int(correct), now) for question_id, selected, correct in answers]
+        with self.connection:
+            self.connection.executemany(
+                "INSERT INTO answers (question_id, selected, correct, answered_at) VALUES (?, ?, ?, ?)", rows
+            )
+            self.connection.executemany(
+                """INSERT INTO question_stats (question_id, attempts, wrong, last_seen) VALUES (?, 1, 1 - ?, ?)
+                ON CONFLICT (question_id) DO UPDATE SET
+                    attempts = attempts + 1, wrong = wrong + excluded.wrong, last_seen = excluded.last_seen""",
+                [(question_id, correct, answered_at) for question_id, _, correct, answered_at in rows]
+            )
+
+    def answer_statistics(self):
+        """(category, answers, wrong answers, time of the last answer) per category,
+        summed from the statistics per question instead of the answers"""
+        rows = self.connection.execute(
+            """SELECT c.name, sum(s.attempts), sum(s.wrong), max(s.last_seen)
+            FROM question_stats s
+            JOIN questions q ON q.id = s.question_id
+            JOIN categories c ON c.id = q.category_id
+            GROUP BY c.id ORDER BY c.id"""
+        )
+        return [(name, attempts, wrong, int(last_seen)) for name, attempts, wrong, last_seen in rows]
+
+    def close(self):
+        self.connection.close()
+
+    def category_id(self, kind, name):
+        """Return the row ID of a category or subcategory, adding it if it is new"""
+        self.connection.execute(
+            "INSERT OR IGNORE INTO categories (kind, name) VALUES (?, ?)", (kind, name)
+        )
+        (row_id,) = self.connection.execute(
+            "SELECT id FROM categories WHERE kind = ? AND name IS ?", (kind, name)
+        ).fetchone()
+        return row_id
+
+    def import_questions(self, questions):
+        """Replace all questions and marks by the given question dictionaries.
+        The answer history is kept."""
+        resolve_correct_indexes(questions)
+        with self.connection:
+            self.connection.execute("DELETE FROM marks")
+            self.connection.execute("DELETE FROM questions")
+            self.connection.execute("DELETE FROM categories")
+            for position, entry in enumerate(questions):
+                self.connection.execute(
+                    """INSERT INTO questions
+                    (id, position, category_id, subcategory_id, question, options, correct, correct_index, image)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                    (
+                        entry['id'], position,
+                        self.category_id('category', entry.get('category')),
+                        self.category_id('subcategory', entry.get('subcategory')),
+                        entry['question'],
+                        json.dumps(entry['options'], ensure_ascii=False),
+                        entry.get('correct'),
+                        entry['correct_index'],
+                        entry.get('image', ""),
+                    )
+                )
+                if entry.get('marked', False):
+                    self.connection.execute(
+                        "INSERT INTO marks (question_id) VALUES (?)", (entry['id'],)
+                    )
+
+    def export_questions(self):
+        """Return all questions in file order, in the format of the JSON question files"""
+        rows = self.connection.execute("SELECT " + QUESTION_COLUMNS + " ORDER BY q.position")
+        questions = []
+        for row in rows:
+            question = to_question(row)
+            # The correct option is stored as text in question files
+            del question['correct_index']
+            questions.append(question)
+        return questions
+
+
+def import_json(source, database):
+    """Copy the questions of a question file or folder into a database"""
+    bank = QuestionBank.load(source, use_cache=False)
+    questions = [bank.body(entry) for entry in bank.questions]
+    bank.close()
+    db = SQLiteBank(database)
+    db.import_questions(questions)
+    db.close()
+    return len(questions)
+
+
+def export_json(database, target):
+    """Write the questions of a database to a JSON question file"""
+    db = SQLiteBank(database)
+    questions = db.export_questions()
+    db.close()
+    temp_path = target + '.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as file:
+        json.dump(questions, file, ensure_ascii=False, indent=4)
+    os.replace(temp_path, target)
+    return len(questions)
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(
+        description="Copy questions between JSON question files and a SQLite database."
+    )
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    import_parser = subparsers.add_parser('import', help="JSON file or folder -> database")
+    import_parser.add_argument('source')
+    import_parser.add_argument('database')
+    export_parser = subparsers.add_parser('export', help="database -> JSON file")
+    export_parser.add_argument('database')
+    export_parser.add_argument('target')
+    args = parser.parse_args()
+
+    if args.command == 'import':
+        count = import_json(args.source, args.database)
+        print(f"Imported {count} questions from {args.source} into {args.database}")
+    else:
+        if not os.path.exists(args.database):
+            sys.exit(f"{args.database} does not exist")
+        count = export_json(args.database, args.target)
+        print(f"Exported {count} questions from {args.database} into {args.target}")
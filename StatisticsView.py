@@ -0,0 +1,49 @@
+import time
+from PyQt6.QtWidgets import (
+    QDialog, QVBoxLayout, QLabel, QPushButton, QTableWidget, QTableWidgetItem, QHeaderView
+)
+
+
+class StatisticsView(QDialog):
+    """Shows how often the questions of each category were answered and how many answers
+    were wrong. rows are (category, answers, wrong answers, time of the last answer) as
+    returned by answer_statistics() of the question bank; one row per category is all
+    the dialog needs, however long the answer history is."""
+
+    def __init__(self, rows, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.setWindowTitle("Statistik")
+        self.resize(600, 400)
+        self.setLayout(QVBoxLayout())
+
+        total = sum(attempts for _, attempts, _, _ in rows)
+        wrong = sum(wrong for _, _, wrong, _ in rows)
+        if total:
+            summary = f"{total} Antworten, davon {(total - wrong) / total * 100:.1f}% richtig"
+        else:
+            summary = "Noch keine Antworten. Beende ein Quiz, um hier deine Ergebnisse zu sehen."
+        self.summary_label = QLabel(summary)
+        self.summary_label.setWordWrap(True)
+
+        self.table = QTableWidget(len(rows), 4)
+        self.table.setHorizontalHeaderLabels(["Kategorie", "Antworten", "Fehlerquote", "Zuletzt beantwortet"])
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        self.table.verticalHeader().hide()
+        self.table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        for row, (category, attempts, wrong_answers, last_seen) in enumerate(rows):
+            cells = (
+                str(category),
+                str(attempts),
+                f"{wrong_answers / attempts * 100:.1f}%" if attempts else "-",
+                time.strftime("%d.%m.%Y %H:%M", time.localtime(last_seen)) if last_seen else "-",
+            )
+            for column, text in enumerate(cells):
+                self.table.setItem(row, column, QTableWidgetItem(text))
+
+        self.close_button = QPushButton("Schließen")
+        self.close_button.setProperty("role", "navigation")
+        self.close_button.clicked.connect(self.accept)
+
+        self.layout().addWidget(self.summary_label)
+        self.layout().addWidget(self.table)
+        self.layout().addWidget(self.close_button)
@@ -0,0 +1,195 @@
+from bisect import bisect_left
+from PyQt6.QtCore import Qt, QAbstractListModel, QModelIndex, pyqtSignal
+from PyQt6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QLineEdit, QListView, QLabel, QPushButton
+
+# Substrings up to this length are indexed directly; longer queries intersect them
+GRAM_LENGTH = 3
+
+
+class NameIndex:
+    """Prefix and substring index over a list of names, case-insensitive.
+    Prefixes are found by bisecting the sorted names. Substrings are found through
+    an index of all name pieces of up to GRAM_LENGTH characters; longer queries
+    intersect the pieces and check the few remaining candidates."""
+
+    def __init__(self, names):
+        self.names = names
+        self.lower = [name.lower() for name in names]
+        self.sorted = sorted(range(len(names)), key=lambda row: self.lower[row])
+        self.sorted_lower = [self.lower[row] for row in self.sorted]
+        self.grams = {}  # piece of a name -> set of rows
+        for row, name in enumerate(self.lower):
+            for length in range(1, GRAM_LENGTH + 1):
+                for start in range(len(name) - length + 1):
+                    self.grams.setdefault(name[start:start + length], set()).add(row)
+
+    def prefix(self, query):
+        """Rows of the names starting with query, sorted by name"""
+        query = query.lower()
+        rows = []
+        i = bisect_left(self.sorted_lower, query)
+        while i < len(self.sorted_lower) and self.sorted_lower[i].startswith(query):
+            rows.append(self.sorted[i])
+            i += 1
+        return rows
+
+    def search(self, query):
+        """Rows of the names containing query, names starting with it first.
+        An empty query returns all rows, sorted by name."""
+        query = query.lower()
+        if not query:
+            return list(self.sorted)
+        if len(query) <= GRAM_LENGTH:
+            candidates = self.grams.get(query, set())
+        else:
+            pieces = sorted(
+                (self.grams.get(query[i:i + GRAM_LENGTH], set())
+                 for i in range(len(query) - GRAM_LENGTH + 1)),
+                key=len
+            )
+            candidates = set.intersection(*pieces)
+            candidates = {row for row in candidates if query in self.lower[row]}
+        prefix = self.prefix(query)
+        first = set(prefix)
+        rest = sorted((row for row in candidates if row not in first), key=lambda row: self.lower[row])
+        return prefix + rest
+
+
+class CheckableListModel(QAbstractListModel):
+    """List of checkable names, of which only the rows matching a filter are shown.
+    checkedChanged is emitted once per change of the checked rows, also for bulk changes."""
+
+    checkedChanged = pyqtSignal()
+
+    def __init__(self, names, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.setNames(names)
+
+    def setNames(self, names):
+        """Replace all names; clears the filter and the checked rows"""
+        self.beginResetModel()
+        self.names = names
+        self.index_ = NameIndex(names)
+        self.visible = self.index_.search("")  # rows of self.names that are shown
+        self.checked = set()  # rows of self.names that are checked
+        self.endResetModel()
+        self.checkedChanged.emit()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.visible)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        row = self.visible[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return self.names[row]
+        if role == Qt.ItemDataRole.CheckStateRole:
+            return Qt.CheckState.Checked if row in self.checked else Qt.CheckState.Unchecked
+        return None
+
+    def setData(self, index, value, role=Qt.ItemDataRole.EditRole):
+        if not index.isValid() or role != Qt.ItemDataRole.CheckStateRole:
+            return False
+        row = self.visible[index.row()]
+        if Qt.CheckState(value) == Qt.CheckState.Checked:
+            self.checked.add(row)
+        else:
+            self.checked.discard(row)
+        self.dataChanged.emit(index, index, [role])
+        self.checkedChanged.emit()
+        return True
+
+    def flags(self, index):
+        return Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsUserCheckable
+
+    def setFilter(self, text):
+        self.beginResetModel()
+        self.visible = self.index_.search(text.strip())
+        self.endResetModel()
+
+    def setCheckedRows(self, rows):
+        """Check exactly the given rows of self.names, with a single update of the view"""
+        rows = set(rows)
+        if rows == self.checked:
+            return
+        self.checked = rows
+        if self.visible:
+            self.dataChanged.emit(
+                self.index(0), self.index(len(self.visible) - 1), [Qt.ItemDataRole.CheckStateRole]
+            )
+        self.checkedChanged.emit()
+
+    def checkVisible(self):
+        """Check all rows that match the filter, in addition to the checked ones"""
+        self.setCheckedRows(self.checked.union(self.visible))
+
+    def uncheckAll(self):
+        self.setCheckedRows(())
+
+    def setCheckedNames(self, names):
+        """Check exactly the rows with the given names"""
+        names = set(names)
+        self.setCheckedRows(row for row, name in enumerate(self.names) if name in names)
+
+
+class SubcategoryPicker(QWidget):
+    """Search field and checkable list for choosing subcategories.
+    The list view only draws the rows that are scrolled into view, so thousands of
+    subcategories stay responsive; typing in the search field filters the list.
+    selectionChanged is emitted once per change of the checked subcategories."""
+
+    selectionChanged = pyqtSignal()
+
+    def __init__(self, names, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.setLayout(QVBoxLayout())
+
+        self.search = QLineEdit()
+        self.search.setPlaceholderText("Unterkategorien suchen …")
+        self.search.setClearButtonEnabled(True)
+
+        self.model = CheckableListModel([name for name in names if name is not None], self)
+        self.view = QListView()
+        # With uniform item sizes the view does not measure every row
+        self.view.setUniformItemSizes(True)
+        self.view.setModel(self.model)
+        self.view.setMaximumHeight(250)
+
+        self.check_all_button = QPushButton("Alle angezeigten auswählen")
+        self.uncheck_all_button = QPushButton("Auswahl aufheben")
+        for button in (self.check_all_button, self.uncheck_all_button):
+            button.setProperty("role", "navigation")
+        buttons = QHBoxLayout()
+        buttons.addWidget(self.check_all_button)
+        buttons.addWidget(self.uncheck_all_button)
+
+        self.count_label = QLabel()
+
+        self.layout().addWidget(self.search)
+        self.layout().addWidget(self.view)
+        self.layout().addLayout(buttons)
+        self.layout().addWidget(self.count_label)
+
+        self.search.textChanged.connect(self.model.setFilter)
+        self.check_all_button.clicked.connect(self.model.checkVisible)
+        self.uncheck_all_button.clicked.connect(self.model.uncheckAll)
+        self.model.checkedChanged.connect(self.updateCount)
+        self.updateCount()
+
+    def updateCount(self):
+        self.count_label.setText(f"{len(self.model.checked)} ausgewählt")
+        self.selectionChanged.emit()
+
+    def setNames(self, names):
+        """Show a new list of subcategories, e.g. once the question bank is loaded"""
+        self.search.clear()
+        self.model.setNames([name for name in names if name is not None])
+
+    def selectedKeys(self):
+        """Names of the checked subcategories, in the order of the list"""
+        return [self.model.names[row] for row in sorted(self.model.checked)]
+
+    def setSelectedKeys(self, names):
+        """Check exactly the subcategories with the given names"""
+        self.model.setCheckedNames(names)
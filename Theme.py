@@ -0,0 +1,202 @@
+import time
+from string import Template
+from PyQt6.QtCore import QEvent
+from PyQt6.QtWidgets import QApplication
+
+# Colours of the available themes
+THEMES = {
+    'light': {
+        'background': '#f0f2f5',
+        'text': '#1a237e',
+        'panel': '#e3f2fd',
+        'surface': 'white',
+        'border': '#ddd',
+        'hover': '#f5f5f5',
+        'selected': '#d3f1ff',
+        'accent': '#0398c6',
+        'accent_light': '#00c1ff',
+        'accent_pressed': '#016c8e',
+        'navigation': '#73c2ff',
+        'navigation_hover': '#2ECCFA',
+        'mark': '#ff6b6b',
+        'mark_hover': '#ff5252',
+    },
+    'dark': {
+        'background': '#263238',
+        'text': '#e3f2fd',
+        'panel': '#37474f',
+        'surface': '#455a64',
+        'border': '#546e7a',
+        'hover': '#4f6570',
+        'selected': '#01579b',
+        'accent': '#0398c6',
+        'accent_light': '#00c1ff',
+        'accent_pressed': '#016c8e',
+        'navigation': '#1976d2',
+        'navigation_hover': '#2196f3',
+        'mark': '#c62828',
+        'mark_hover': '#e53935',
+    },
+}
+
+# Stylesheet for the whole application. Widgets are styled through their object name
+# (e.g. #questionLabel) or the dynamic property 'role', so no widget needs its own stylesheet.
+STYLESHEET = Template("""
+    * {
+        font-size: 12pt;
+    }
+    QWidget {
+        background-color: $background;
+        border-radius: 5px;
+        padding: 15px;
+    }
+    QLabel {
+        color: $text;
+        font-size: 14pt;
+        margin-bottom: 10px;
+    }
+    QPushButton {
+        background-color: $accent;
+        color: white;
+        border: none;
+        padding: 10px;
+        font-size: 12pt;
+        border-radius: 5px;
+        margin: 5px;
+    }
+    QPushButton:hover {
+        background-color: $accent;
+    }
+    QPushButton:pressed {
+        background-color: $accent_pressed;
+    }
+    QComboBox {
+        color: $text;
+        padding: 5px;
+        border-radius: 3px;
+        border: 1px solid $border;
+        font-size: 12pt;
+    }
+    QRadioButton {
+        color: $text;
+        font-size: 12pt;
+        margin-bottom: 5px;
+        padding: 3px;
+    }
+    QProgressBar {
+        background-color: $panel;
+        border-radius: 3px;
+        height: 20px;
+        text-align: center;
+        font-size: 10pt;
+    }
+    QProgressBar::chunk {
+        background-color: $accent;
+    }
+
+    #header, #header QWidget {
+        background-color: $panel;
+    }
+    #header {
+        padding: 15px;
+        border-radius: 5px;
+    }
+    QPushButton[role="start"] {
+        background-color: qlineargradient(spread:pad, x1:0, y1:0, x2:1, y2:1, stop:0 $accent, stop:1 $accent_light);
+        font-weight: bold;
+        min-width: 200px;
+    }
+
+    #categoryLabel {
+        padding: 5px;
+        border-radius: 5px;
+        margin-bottom: 5px;
+    }
+    #questionLabel {
+        background-color: $surface;
+        padding: 15px;
+        border-radius: 5px;
+        margin-bottom: 15px;
+    }
+    #questionImage {
+        background-color: $surface;
+        padding: 10px;
+        border-radius: 5px;
+        margin: 15px 0;
+    }
+    QRadioButton[role="option"] {
+        background-color: $surface;
+        padding: 10px;
+        margin: 5px 0;
+        border: 1px solid $border;
+        border-radius: 3px;
+    }
+    QRadioButton[role="option"]:hover {
+        background-color: $hover;
+    }
+    QRadioButton[role="option"]:checked {
+        background-color: $selected;
+        border-color: $accent;
+    }
+    QPushButton[role="navigation"] {
+        background-color: $navigation;
+        padding: 10px;
+    }
+    QPushButton[role="navigation"]:hover {
+        background-color: $navigation_hover;
+    }
+    #previousButton {
+        margin-right: 10px;
+    }
+    #markButton {
+        background-color: $mark;
+        padding: 10px;
+        margin-right: 10px;
+    }
+    #markButton:hover {
+        background-color: $mark_hover;
+    }
+""")
+
+
+def stylesheet(name):
+    """Return the application stylesheet for the theme with the given name"""
+    return STYLESHEET.substitute(THEMES[name])
+
+
+def apply_theme(app, name):
+    """Style the whole application with a theme. Unknown names fall back to 'light'."""
+    if name not in THEMES:
+        print(f"Unknown theme {name!r}, using 'light'")
+        name = 'light'
+    app.setStyleSheet(stylesheet(name))
+
+
+class MeteredApplication(QApplication):
+    """QApplication that measures how long Qt spends handling polish and style change
+    events, and reports it once per shown question. Timing every event in Python slows
+    the application down, so this is only used when it is asked for."""
+
+    POLISH_EVENTS = (QEvent.Type.Polish, QEvent.Type.PolishRequest, QEvent.Type.StyleChange)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.frame = 0
+        self.polish_count = 0
+        self.polish_seconds = 0.0
+
+    def notify(self, receiver, event):
+        if event.type() in self.POLISH_EVENTS:
+            start = time.perf_counter()
+            result = super().notify(receiver, event)
+            self.polish_seconds += time.perf_counter() - start
+            self.polish_count += 1
+            return result
+        return super().notify(receiver, event)
+
+    def end_frame(self):
+        """Print the polish cost since the last frame and start counting again"""
+        self.frame += 1
+        print(f"Frame {self.frame}: {self.polish_count} polish events, {self.polish_seconds * 1000:.2f} ms")
+        self.polish_count = 0
+        self.polish_seconds = 0.0
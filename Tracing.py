@@ -0,0 +1,143 @@
+import os
+import sys
+import json
+import time
+import threading
+
+# Trace file used when tracing is switched on without a file name
+DEFAULT_TRACE_FILE = "quiz_trace.jsonl"
+
+
+class Span:
+    """Measures the time of a with block and writes it to the trace file.
+    Extra fields, e.g. the number of loaded questions, can be added with set()."""
+
+    __slots__ = ('tracer', 'name', 'fields', 'wall', 'start')
+
+    def __init__(self, tracer, name, fields):
+        self.tracer = tracer
+        self.name = name
+        self.fields = fields
+
+    def set(self, **fields):
+        self.fields.update(fields)
+
+    def __enter__(self):
+        self.wall = time.time()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        duration = time.perf_counter() - self.start
+        self.tracer.write({'name': self.name, 'ts': self.wall, 'ms': duration * 1000, **self.fields})
+        return False
+
+
+class NullSpan:
+    """Span used while tracing is off; does nothing"""
+
+    __slots__ = ()
+
+    def set(self, **fields):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+NULL_SPAN = NullSpan()
+
+
+class Tracer:
+    """Writes spans as JSON Lines, one object per line"""
+
+    def __init__(self, path):
+        self.path = path
+        # Line buffered, so the trace survives a frozen or killed quiz
+        self.file = open(path, 'a', encoding='utf-8', buffering=1)
+        # The question bank is loaded on a worker thread
+        self.lock = threading.Lock()
+
+    def write(self, record):
+        line = json.dumps(record) + '\n'
+        with self.lock:
+            self.file.write(line)
+
+    def close(self):
+        self.file.close()
+
+
+# The active tracer, or None while tracing is off
+tracer = None
+
+
+def enable(path=DEFAULT_TRACE_FILE):
+    """Switch tracing on; spans are appended to the file at path"""
+    global tracer
+    if tracer is not None:
+        tracer.close()
+    tracer = Tracer(path)
+    print(f"Tracing to {path}")
+
+
+def enable_from_environment():
+    """Switch tracing on if the environment variable QUIZ_TRACE names a trace file"""
+    path = os.environ.get('QUIZ_TRACE')
+    if path:
+        enable(path)
+
+
+def span(name, **fields):
+    """Context manager timing a block as the operation name. Costs next to nothing while tracing is off."""
+    if tracer is None:
+        return NULL_SPAN
+    return Span(tracer, name, fields)
+
+
+def event(name, ms, **fields):
+    """Write an operation that was timed elsewhere, e.g. the time until the window was first drawn"""
+    if tracer is not None:
+        tracer.write({'name': name, 'ts': time.time(), 'ms': ms, **fields})
+
+
+def percentile(sorted_values, share):
+    """Value below which the given share of the sorted values lies (nearest rank)"""
+    rank = max(0, min(len(sorted_values) - 1, round(share * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+def summarize(path):
+    """Durations per operation in a trace file, as name -> sorted list of milliseconds"""
+    durations = {}
+    with open(path, encoding='utf-8') as file:
+        for line in file:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # Last line of a trace whose quiz was killed while writing
+                continue
+            durations.setdefault(record['name'], []).append(record['ms'])
+    for values in durations.values():
+        values.sort()
+    return durations
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Print percentiles per operation of a quiz trace file.")
+    parser.add_argument('path', nargs='?', default=DEFAULT_TRACE_FILE, help=f"trace file (default: {DEFAULT_TRACE_FILE})")
+    args = parser.parse_args()
+    if not os.path.exists(args.path):
+        sys.exit(f"{args.path} does not exist")
+
+    durations = summarize(args.path)
+    print(f"{'operation':<28} {'count':>7} {'p50 ms':>10} {'p90 ms':>10} {'p99 ms':>10} {'max ms':>10}")
+    for name in sorted(durations):
+        values = durations[name]
+        print(
+            f"{name:<28} {len(values):>7} {percentile(values, 0.5):>10.3f} {percentile(values, 0.9):>10.3f} "
+            f"{percentile(values, 0.99):>10.3f} {values[-1]:>10.3f}"
+        )
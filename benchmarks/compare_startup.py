@@ -0,0 +1,66 @@
+"""Compares how long different builds of the quiz take to start, e.g. the onefile build
+of main.spec and the onedir build of main_onedir.spec.
+
+Each program is started several times with QUIZ_EXIT_AFTER_LOAD=1, so it closes as soon
+as its questions are loaded. The time from starting the process until it exits is
+measured from outside, so it includes unpacking the onefile build, which the quiz itself
+can't see. Python scripts are started with the current interpreter.
+
+    python benchmarks/compare_startup.py dist/main.exe dist/main/main.exe --runs 10
+"""
+import os
+import sys
+import json
+import time
+import subprocess
+
+from run_benchmarks import summarize
+
+
+def command_for(program):
+    if program.endswith('.py'):
+        return [sys.executable, program]
+    return [program]
+
+
+def time_startup(program, runs, env, timeout):
+    """Start program runs times and return the time until it exited, in seconds"""
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(
+            command_for(program), env=env, check=True, timeout=timeout,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        times.append(time.perf_counter() - start)
+    return times
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Compare the startup time of builds of the quiz.")
+    parser.add_argument('programs', nargs='+', help="built executables or main.py")
+    parser.add_argument('--runs', type=int, default=10, help="timed starts per program (default: 10)")
+    parser.add_argument('--warmup', type=int, default=1, help="untimed starts first, to fill the disk cache (default: 1)")
+    parser.add_argument('--data-dir', help="external data folder for all programs (sets QUIZ_DATA_DIR)")
+    parser.add_argument('--timeout', type=float, default=120, help="seconds before a start counts as hung (default: 120)")
+    parser.add_argument('--output', help="JSON file for the results (default: print to stdout)")
+    args = parser.parse_args()
+
+    env = dict(os.environ, QUIZ_EXIT_AFTER_LOAD='1')
+    if args.data_dir:
+        env['QUIZ_DATA_DIR'] = os.path.abspath(args.data_dir)
+
+    report = {'parameters': vars(args), 'results': []}
+    for program in args.programs:
+        time_startup(program, args.warmup, env, args.timeout)
+        stats = summarize(time_startup(program, args.runs, env, args.timeout))
+        report['results'].append({'program': program, 'startup': stats})
+        print(f"{program:<40} median {stats['median_ms']:9.1f} ms  p95 {stats['p95_ms']:9.1f} ms")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent=2)
+        print(f"Wrote results to {args.output}")
+    else:
+        print(json.dumps(report, indent=2))
@@ -0,0 +1,121 @@
+"""Generates synthetic question banks for the benchmarks.
+
+A generated bank has the same layout as the quiz folder: the questions in
+'questions/bank.json' (or .jsonl, or .db) and the images in 'pictures/'.
+Run the quiz or the benchmarks from the output folder to use it.
+"""
+import os
+import sys
+import json
+import zlib
+import struct
+import random
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+WORDS = (
+    "Liste Index Funktion Variable Schleife Bedingung Wert Datei Modul Klasse "
+    "Objekt Methode Zeichenkette Zahl Tabelle Spalte Zeile Abfrage Speicher Netzwerk "
+    "Server Anfrage Antwort Fehler Ausnahme Test Version Paket Umgebung Ausgabe"
+).split()
+FORMATS = ('json', 'jsonl', 'db')
+
+
+def write_png(path, width, height, color):
+    """Write a single-coloured RGB PNG, without needing an image library"""
+    def chunk(kind, data):
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data) & 0xffffffff)
+    row = b'\x00' + bytes(color) * width
+    with open(path, 'wb') as file:
+        file.write(b'\x89PNG\r\n\x1a\n')
+        file.write(chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)))
+        file.write(chunk(b'IDAT', zlib.compress(row * height, 6)))
+        file.write(chunk(b'IEND', b''))
+
+
+def sentence(rng, words):
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def generate_questions(size, categories=10, subcategories=5, option_words=8,
+                       image_ratio=0.2, images=(), seed=0):
+    """Return size questions, spread evenly over categories x subcategories.
+    Each question has four options of option_words words. A share of image_ratio
+    of the questions shows one of the given image paths."""
+    rng = random.Random(seed)
+    questions = []
+    for number in range(size):
+        category = number % categories
+        subcategory = (number // categories) % subcategories
+        options = [f"{letter}) {sentence(rng, option_words)}" for letter in "abcd"]
+        question = {
+            'id': f"q{number:08d}",
+            'question': f"Frage {number}: {sentence(rng, 12)}?",
+            'options': options,
+            'correct': rng.choice(options),
+            'category': f"Kategorie {category}",
+            'subcategory': f"Thema {category}.{subcategory}",
+            'marked': rng.random() < 0.05,
+        }
+        if images and rng.random() < image_ratio:
+            question['image'] = rng.choice(images)
+        questions.append(question)
+    return questions
+
+
+def generate_bank(directory, size, categories=10, subcategories=5, option_words=8,
+                  image_ratio=0.2, image_count=16, image_size=(1600, 900), bank_format='json', seed=0):
+    """Write a synthetic bank into directory and return the path of the question file"""
+    if bank_format not in FORMATS:
+        raise ValueError(f"Unknown bank format {bank_format!r}, expected one of {FORMATS}")
+    question_dir = os.path.join(directory, 'questions')
+    picture_dir = os.path.join(directory, 'pictures')
+    os.makedirs(question_dir, exist_ok=True)
+    os.makedirs(picture_dir, exist_ok=True)
+
+    rng = random.Random(seed)
+    images = []
+    if image_ratio > 0:
+        for number in range(image_count):
+            name = f"image_{number:03d}.png"
+            color = (rng.randrange(256), rng.randrange(256), rng.randrange(256))
+            write_png(os.path.join(picture_dir, name), *image_size, color)
+            # Relative to the bank folder, like the images of the real quiz
+            images.append(f"pictures/{name}")
+
+    questions = generate_questions(size, categories, subcategories, option_words, image_ratio, images, seed)
+    json_path = os.path.join(question_dir, 'bank.json')
+    if bank_format == 'jsonl':
+        path = os.path.join(question_dir, 'bank.jsonl')
+        with open(path, 'w', encoding='utf-8') as file:
+            for question in questions:
+                file.write(json.dumps(question, ensure_ascii=False) + '\n')
+        return path
+    with open(json_path, 'w', encoding='utf-8') as file:
+        json.dump(questions, file, ensure_ascii=False, indent=4)
+    if bank_format == 'db':
+        from SQLiteBank import import_json
+        path = os.path.join(question_dir, 'bank.db')
+        import_json(json_path, path)
+        os.remove(json_path)
+        return path
+    return json_path
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Generate a synthetic question bank.")
+    parser.add_argument('directory', help="output folder, gets 'questions' and 'pictures' subfolders")
+    parser.add_argument('--size', type=int, default=10000, help="number of questions (default: 10000)")
+    parser.add_argument('--categories', type=int, default=10, help="number of categories (default: 10)")
+    parser.add_argument('--subcategories', type=int, default=5, help="subcategories per category (default: 5)")
+    parser.add_argument('--option-words', type=int, default=8, help="words per answer option (default: 8)")
+    parser.add_argument('--image-ratio', type=float, default=0.2, help="share of questions with an image (default: 0.2)")
+    parser.add_argument('--format', choices=FORMATS, default='json', help="bank format (default: json)")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    path = generate_bank(
+        args.directory, args.size, args.categories, args.subcategories,
+        args.option_words, args.image_ratio, bank_format=args.format, seed=args.seed
+    )
+    print(f"Wrote {args.size} questions to {path}")
@@ -0,0 +1,203 @@
+"""Times the quiz's main operations on synthetic banks and writes the results as JSON.
+
+For every bank size, a bank is generated (see generate_bank.py) and the following
+operations are timed: parsing and loading the bank, load_questions, create_exam,
+mark_question, finish_quiz and show_question. show_question runs the real Quiz
+window on Qt's offscreen platform; --no-gui skips it.
+
+    python benchmarks/run_benchmarks.py --sizes 1000 10000 --output results.json
+"""
+import os
+import sys
+import json
+import time
+import random
+import platform
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from generate_bank import generate_bank, FORMATS
+from QuestionBank import QuestionBank, open_bank
+from QuizSession import QuizSession
+from Tracing import percentile
+
+
+def measure(function, repeat):
+    """Call function repeat times and return the duration of each call in seconds"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def summarize(times):
+    """Statistics of a list of durations, in milliseconds"""
+    times = sorted(times)
+    return {
+        'runs': len(times),
+        'mean_ms': sum(times) / len(times) * 1000,
+        'median_ms': percentile(times, 0.5) * 1000,
+        'p95_ms': percentile(times, 0.95) * 1000,
+        'min_ms': times[0] * 1000,
+        'max_ms': times[-1] * 1000,
+    }
+
+
+def bench_bank(path, repeat):
+    """Time parsing the question file and loading it through the compiled cache"""
+    results = {}
+
+    def load_and_close(load):
+        def run():
+            load(path).close()
+        return run
+
+    if not path.endswith('.db'):
+        results['bank_parse'] = measure(load_and_close(lambda p: QuestionBank.load(p, use_cache=False)), repeat)
+        # The first load writes the cache, the timed ones read it
+        open_bank(path).close()
+    results['bank_load'] = measure(load_and_close(open_bank), repeat)
+    return results
+
+
+def bench_session(path, repeat, exam_questions, seed):
+    """Time selecting questions, exams, marking and grading on a QuizSession"""
+    rng = random.Random(seed)
+    bank = open_bank(path)
+    session = QuizSession(bank, exam_questions, random.Random(seed))
+    categories = bank.categories()
+    subcategories = bank.subcategories()
+    results = {}
+
+    results['load_questions_category'] = measure(
+        lambda: session.load_questions([rng.choice(categories)]), repeat
+    )
+    results['load_questions_subcategories'] = measure(
+        lambda: session.load_questions(rng.sample(subcategories, min(5, len(subcategories)))), repeat
+    )
+    results['create_exam'] = measure(session.start_exam, repeat)
+
+    session.start(bank.select(categories))
+
+    def mark():
+        session.current_question = rng.randrange(len(session.questions))
+        session.toggle_mark()
+    results['mark_question'] = measure(mark, repeat)
+    # Marks of question files are written in batches, time writing the last batch
+    journal = getattr(bank, 'journal', None)
+    if journal is not None:
+        results['mark_flush'] = measure(journal.flush, 1)
+
+    def finish():
+        session.start(bank.select(categories))
+        for position in range(len(session.questions)):
+            session.current_question = position
+            session.answer(rng.randrange(4))
+        start = time.perf_counter()
+        session.finish()
+        return time.perf_counter() - start
+    results['finish_quiz'] = [finish() for _ in range(repeat)]
+    bank.close()
+    return results
+
+
+def bench_show_question(directory, path, repeat):
+    """Time moving to the next question in the real Quiz window on the offscreen platform.
+    Between two questions, the window gets the time a user would need to answer:
+    neighbouring questions are prepared and images decoded, as in normal use."""
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from PyQt6.QtWidgets import QApplication
+    from Theme import apply_theme
+    import main
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    apply_theme(app, main.THEME)
+    # The quiz finds its files relative to the working directory
+    working_directory = os.getcwd()
+    os.chdir(directory)
+    main.QUESTIONFILE = os.path.basename(path)
+    try:
+        quiz = main.Quiz()
+        quiz.show()
+        # The bank is loaded on a worker thread, wait until the quiz has received it
+        quiz.loader.wait()
+        app.processEvents()
+        quiz.session.start(quiz.bank.select(quiz.categories))
+        quiz.initialize_quiz()
+        quiz.show_question()
+        steps = min(repeat, len(quiz.session.questions) - 1)
+        times = []
+        for _ in range(steps):
+            # Time the user needs to answer
+            app.processEvents()
+            quiz.images.pool.waitForDone()
+            app.processEvents()
+            start = time.perf_counter()
+            quiz.next_question()
+            app.processEvents()
+            times.append(time.perf_counter() - start)
+        stats = quiz.look_ahead.stats()
+        quiz.close()
+    finally:
+        os.chdir(working_directory)
+    return {'show_question': times}, stats
+
+
+def run(args):
+    report = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'started': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'parameters': vars(args),
+        'results': [],
+    }
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            start = time.perf_counter()
+            path = generate_bank(
+                directory, size, args.categories, args.subcategories, args.option_words,
+                args.image_ratio, bank_format=args.format, seed=args.seed
+            )
+            print(f"Generated {size} questions in {time.perf_counter() - start:.2f} s")
+            # Exams can't take more questions per category than the smallest category has
+            exam_questions = min(args.exam_questions, size // args.categories)
+
+            times = bench_bank(path, args.repeat)
+            times.update(bench_session(path, args.repeat, exam_questions, args.seed))
+            result = {'size': size}
+            if not args.no_gui:
+                gui_times, result['look_ahead'] = bench_show_question(directory, path, args.repeat)
+                times.update(gui_times)
+            result['operations'] = {name: summarize(values) for name, values in times.items()}
+            report['results'].append(result)
+            for name, stats in result['operations'].items():
+                print(f"  {size:>8} {name:<30} median {stats['median_ms']:9.3f} ms  p95 {stats['p95_ms']:9.3f} ms")
+    return report
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Benchmark the quiz on synthetic question banks.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000], help="bank sizes (default: 1000 10000)")
+    parser.add_argument('--categories', type=int, default=10, help="number of categories (default: 10)")
+    parser.add_argument('--subcategories', type=int, default=5, help="subcategories per category (default: 5)")
+    parser.add_argument('--option-words', type=int, default=8, help="words per answer option (default: 8)")
+    parser.add_argument('--image-ratio', type=float, default=0.2, help="share of questions with an image (default: 0.2)")
+    parser.add_argument('--format', choices=FORMATS, default='json', help="bank format (default: json)")
+    parser.add_argument('--exam-questions', type=int, default=10, help="exam questions per category (default: 10)")
+    parser.add_argument('--repeat', type=int, default=20, help="runs per operation (default: 20)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--no-gui', action='store_true', help="skip show_question, which needs PyQt6")
+    parser.add_argument('--output', help="JSON file for the results (default: print to stdout)")
+    args = parser.parse_args()
+
+    report = run(args)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent=2)
+        print(f"Wrote results to {args.output}")
+    else:
+        print(json.dumps(report, indent=2))
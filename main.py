@@ -1,51 +1,93 @@
 import sys
 import os
-import json
-import random
-import Levenshtein
+import time
+# Start of the program, for measuring how long it takes until the window is drawn
+START_TIME = time.perf_counter()
+import multiprocessing
 from PyQt6.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QPushButton, QLabel, 
-    QComboBox, QScrollArea, QMessageBox, QButtonGroup, QProgressBar, 
-    QSizePolicy, QRadioButton, QHBoxLayout
+    QComboBox, QScrollArea, QMessageBox, QProgressBar
 )
-from PyQt6.QtGui import QPixmap, QImage
-from PyQt6.QtCore import Qt
-from CheckableCombo import MultiComboBox
-
-# Name of question file:
+from PyQt6.QtCore import QTimer
+from SubcategoryPicker import SubcategoryPicker
+from QuestionView import QuestionView
+from BankLoader import BankLoader
+from Grading import PASS_PERCENTAGE
+from QuizSession import QuizSession
+from ExamBlueprint import ExamBlueprint
+from StatisticsView import StatisticsView
+from Theme import apply_theme, MeteredApplication
+from ImageCache import ImageLoader
+from DisplayText import OPTION_WRAP_WIDTH
+from LookAhead import LookAhead, PreparedQuestion
+import Tracing
+from Tracing import span
+
+# Name of question file (a JSON array, or JSON Lines with the ending .jsonl).
+# This can also be a folder inside 'questions' with one file per category;
+# an empty name loads every question file in 'questions'.
+# A SQLite database (ending .db or .sqlite, see SQLiteBank.py) can be used instead:
 QUESTIONFILE = "test.json"
 # Number of random questions to be sampled from each category for the exam:
 EXAMQUESTIONNUMBER = 1
+# Optional file in 'questions' that sets how many questions the exam takes from which
+# category or subcategory, a seed for repeatable exams and what happens if a category
+# is too small, written as JSON (see ExamBlueprint.py). Without it, EXAMQUESTIONNUMBER is used.
+# It doesn't end in .json, so it isn't loaded as questions when the whole folder is used:
+EXAMBLUEPRINT = "exam.blueprint"
+# Number of questions in a review of the questions that are due again (see ReviewScheduler.py):
+REVIEWQUESTIONNUMBER = 20
+# Colour theme, 'light' or 'dark' (see Theme.py). The environment variable
+# QUIZ_THEME overrides it. Set QUIZ_POLISH_STATS=1 to print the style polish cost per question.
+THEME = "light"
+# Images are scaled to fit into 800x450 pixels, times a zoom factor:
+MAX_IMAGE_WIDTH = 800
+MAX_IMAGE_HEIGHT = 450
+ZOOM_FACTOR = 0.8
+IMAGE_SIZE = (int(MAX_IMAGE_WIDTH * ZOOM_FACTOR), int(MAX_IMAGE_HEIGHT * ZOOM_FACTOR))
+
+# The questions and pictures can be kept in a folder outside the program, so they can be
+# changed without building the exe again. Files found there are used instead of the built-in
+# ones. Set the folder with the environment variable QUIZ_DATA_DIR, or write it into the
+# first line of a file named like DATA_DIR_FILE next to the program.
+DATA_DIR_FILE = "quiz_data_dir.txt"
+
+def program_dir():
+    """Folder of the built program, or the working folder when main.py is run with python"""
+    if getattr(sys, 'frozen', False):
+        return os.path.dirname(sys.executable)
+    return os.path.abspath('.')
+
+def find_data_dir():
+    """Return the external data folder, or None if none is set"""
+    path = os.environ.get('QUIZ_DATA_DIR')
+    if not path:
+        try:
+            with open(os.path.join(program_dir(), DATA_DIR_FILE), encoding='utf-8') as file:
+                path = file.readline().strip()
+        except FileNotFoundError:
+            return None
+    if not path:
+        return None
+    # Relative folders start at the program's folder
+    path = os.path.join(program_dir(), path)
+    if not os.path.isdir(path):
+        print(f"Data folder {path} does not exist, using the built-in files")
+        return None
+    return path
+
+DATA_DIR = find_data_dir()
 
 def get_resource_path(relative_path):
+    # Files are read where they are, from the external data folder if they are there
+    if DATA_DIR is not None:
+        path = os.path.join(DATA_DIR, relative_path)
+        if os.path.exists(path):
+            return path
     if hasattr(sys, '_MEIPASS'):
         return os.path.join(sys._MEIPASS, relative_path)
     return os.path.join(os.path.abspath('.'), relative_path)
 
-def add_newline(text, max_length = 80):
-    """Adds line breaks to long text to improve readability in the UI"""
-    words = text.split()
-    if not words:
-        return text
-
-    current_length = 0
-    new_text = []
-    
-    # Join words into lines without breaking them
-    for word in words:
-        if current_length + len(word) > max_length:
-            new_text.append('\n')
-            current_length = 0
-        if current_length > 0:
-            new_text.append(' ')
-        new_text.append(word)
-        current_length += len(word) + (1 if current_length > 0 else 0)
-    
-    # Handle hyphenated words by ensuring they stay on one line
-    new_text = ''.join(new_text).replace('-\n', '-')
-    
-    return new_text
-
 class Quiz(QWidget):
     """Main quiz application window"""
     
@@ -57,72 +99,32 @@ class Quiz(QWidget):
         self.create_ui_elements()
         self.configure_ui_layout()
         self.connect_ui_signals()
+        self.load_bank()
 
     def initialize_window(self):
         """Set up basic window properties"""
         self.setWindowTitle("Quiz")
         self.setGeometry(100, 100, 700, 700)
-        self.setStyleSheet("""
-            QWidget {
-                background-color: #f0f2f5;
-                border-radius: 5px;
-                padding: 15px;
-            }
-            QLabel {
-                color: #1a237e;
-                font-size: 14pt;
-                margin-bottom: 10px;
-            }
-            QPushButton {
-                background-color: #0398c6;
-                color: white;
-                border: none;
-                padding: 10px;
-                font-size: 12pt;
-                border-radius: 5px;
-                margin: 5px;
-            }
-            QPushButton:hover {
-                background-color: #0398c6;
-            }
-            QPushButton:pressed {
-                background-color: #016c8e;
-            }
-            QComboBox {
-                padding: 5px;
-                border-radius: 3px;
-                border: 1px solid #ddd;
-                font-size: 12pt;
-            }
-            QRadioButton {
-                font-size: 12pt;
-                margin-bottom: 5px;
-                padding: 3px;
-            }
-            QProgressBar {
-                border-radius: 3px;
-                height: 20px;
-            }
-        """)
+        # All styling comes from the application stylesheet, see Theme.py
         self.main_layout = QVBoxLayout()
         self.setLayout(self.main_layout)
 
     def initialize_quiz_state(self):
         """Initialize quiz state variables"""
-        self.wrong_questions = []
-        self.score = 0
-        self.current_question = 0
-        self.answer_selected = False
-        self.questions = []
-        self.user_answers = {}  # Dictionary to store selected answers
-        self.exam_mode = False
-        # Load categories and subcategories
-        with open(get_resource_path(f'questions/{QUESTIONFILE}'), 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        categories = [element.get('category') for element in data]
-        self.categories = list(set(categories))
-        subcategories = [element.get('subcategory') for element in data]
-        self.subcategories = list(set(subcategories))
+        # Scaled question images, decoded in the background and shared by all quizzes
+        self.images = ImageLoader(parent=self)
+        self.current_image = None  # Image the current question is waiting for
+        # Prepares the neighbouring questions while one is shown
+        self.look_ahead = LookAhead(self.prepare_question)
+        self.prepared = None  # PreparedQuestion currently shown
+        # The question bank is opened in the background once the window exists, see load_bank
+        self.loader = None
+        self.bank = None
+        self.session = None
+        self.scheduler = None
+        self.categories = []
+        self.subcategories = []
+        self.first_paint = None  # Seconds from the start until the window was first drawn
 
     def create_ui_elements(self):
         """Create all UI components"""
@@ -138,22 +140,20 @@ class Quiz(QWidget):
         header_layout.addWidget(self.category_combobox)
         
         header_widget = QWidget()
+        header_widget.setObjectName("header")
         header_widget.setLayout(header_layout)
-        header_widget.setStyleSheet("""
-            background-color: #e3f2fd;
-            padding: 15px;
-            border-radius: 5px;
-        """)
         
         self.main_layout.addWidget(header_widget)
-        self.main_layout.addWidget(self.category_combo)
+        self.main_layout.addWidget(self.subcategory_picker)
         self.main_layout.addWidget(self.start_button)
         self.main_layout.addWidget(self.repeat_marked_questions)
         self.main_layout.addWidget(self.start_exam)
+        self.main_layout.addWidget(self.start_review)
+        self.main_layout.addWidget(self.show_statistics_button)
         self.main_layout.addWidget(self.scroll_area)
         self.main_layout.addWidget(self.progress_bar)
 
-        self.category_combo.hide()
+        self.subcategory_picker.hide()
         self.progress_bar.hide()
         self.questions_marked = True
         if not self.questions_marked:
@@ -162,46 +162,42 @@ class Quiz(QWidget):
     def connect_ui_signals(self):
         """Connect UI components to their respective functions"""
         self.category_combobox.currentTextChanged.connect(self.toggle_subcategory_combo)
+        self.subcategory_picker.selectionChanged.connect(self.update_start_button)
         self.start_button.clicked.connect(self.start_quiz)
         self.repeat_marked_questions.clicked.connect(self.repeat_marked_question)
         self.start_exam.clicked.connect(self.create_exam)
+        self.start_review.clicked.connect(self.review_due_questions)
+        self.show_statistics_button.clicked.connect(self.show_statistics)
+        self.view.answer_selected.connect(self.store_answer)
+        self.view.previous_clicked.connect(self.previous_question)
+        self.view.mark_clicked.connect(self.mark_question)
+        self.view.next_clicked.connect(self.next_or_finish)
+        self.images.image_ready.connect(self.image_ready)
+        self.images.image_failed.connect(self.image_failed)
 
     # UI Components
 
     def create_category_selection(self):
         """Create and configure the category selection UI"""
-        self.choose_category_label = QLabel("Wähle das Thema aus, das du üben möchtest. Wähle 'Unterkategorien aussuchen', wenn du bestimmte Unterthemen üben möchtest.")
+        # The categories are added once the question bank is loaded
+        self.choose_category_label = QLabel("Fragen werden geladen …")
         self.category_combobox = QComboBox()
-        Itemlist = self.categories
-        Itemlist.append("Unterkategorien aussuchen")
-        self.category_combobox.addItems(
-            Itemlist
-        )
-        
-        self.category_combo = MultiComboBox()
-        self.category_combo.addItems(self.subcategories)
-        self.category_combo.hide()
+
+        self.subcategory_picker = SubcategoryPicker(self.subcategories)
+        self.subcategory_picker.hide()
 
     def create_start_buttons(self):
         """Creates and configures the buttons shown when the user starts the program."""
         self.start_button = QPushButton("Quiz starten")
         self.repeat_marked_questions = QPushButton("Markierte Fragen wiederholen")
         self.start_exam = QPushButton("Prüfung starten")
-        self.start_button.setStyleSheet("""
-            background-color: qlineargradient(spread:pad, x1:0, y1:0, x2:1, y2:1, stop:0 #0398c6, stop:1 #00c1ff);
-            font-weight: bold;
-            min-width: 200px;
-        """)
-        self.repeat_marked_questions.setStyleSheet("""
-            background-color: qlineargradient(spread:pad, x1:0, y1:0, x2:1, y2:1, stop:0 #0398c6, stop:1 #00c1ff);
-            font-weight: bold;
-            min-width: 200px;
-        """)
-        self.start_exam.setStyleSheet("""
-            background-color: qlineargradient(spread:pad, x1:0, y1:0, x2:1, y2:1, stop:0 #0398c6, stop:1 #00c1ff);
-            font-weight: bold;
-            min-width: 200px;
-        """)
+        self.start_review = QPushButton("Fällige Fragen wiederholen")
+        self.show_statistics_button = QPushButton("Statistik anzeigen")
+        for button in (
+            self.start_button, self.repeat_marked_questions, self.start_exam,
+            self.start_review, self.show_statistics_button
+        ):
+            button.setProperty("role", "start")
         
 
     def create_scroll_area(self):
@@ -209,30 +205,101 @@ class Quiz(QWidget):
         self.scroll_area = QScrollArea()
         self.scroll_area.setWidgetResizable(True)
 
-        self.container = QWidget()
-        self.container.setLayout(QVBoxLayout())
-        self.scroll_area.setWidget(self.container)
+        # The question view is created once and reused for every question
+        self.view = QuestionView()
+        self.view.hide()
+        self.scroll_area.setWidget(self.view)
 
     def create_progress_bar(self):
         """Create and configure the progress bar"""
         self.progress_bar = QProgressBar()
-        self.progress_bar.setStyleSheet("""
-            QProgressBar { 
-                background-color: #e3f2fd; 
-                border-radius: 3px; 
-                text-align: center; 
-                font-size: 10pt;
-            } 
-            QProgressBar::chunk { 
-                background-color: #0398c6; 
-            }
-        """)
+
+    # Loading the question bank
+
+    def load_bank(self):
+        """Open the question bank on a worker thread. The window is shown meanwhile,
+        the menu is enabled once the questions are loaded."""
+        self.set_menu_enabled(False)
+        self.loader = BankLoader(get_resource_path(f'questions/{QUESTIONFILE}'), self)
+        self.loader.loaded.connect(self.bank_loaded)
+        self.loader.failed.connect(self.bank_failed)
+        self.loader.start()
+
+    def bank_loaded(self, bank, scheduler):
+        """Fill the category selection with the categories of the loaded bank"""
+        # The question file is parsed once, all later lookups use the bank's indexes
+        self.bank = bank
+        for line in self.bank.load_report():
+            print(line)
+        self.categories = self.bank.categories()
+        self.subcategories = self.bank.subcategories()
+        # Questions, answers and grading of the running quiz, see QuizSession.py
+        # Review state of every graded question, stored next to the questions
+        self.scheduler = scheduler
+        self.session = QuizSession(
+            self.bank, EXAMQUESTIONNUMBER, blueprint=self.load_blueprint(), scheduler=self.scheduler
+        )
+
+        self.choose_category_label.setText("Wähle das Thema aus, das du üben möchtest. Wähle 'Unterkategorien aussuchen', wenn du bestimmte Unterthemen üben möchtest.")
+        Itemlist = list(self.categories)
+        Itemlist.append("Unterkategorien aussuchen")
+        self.category_combobox.addItems(
+            Itemlist
+        )
+        self.subcategory_picker.setNames(self.subcategories)
+        self.set_menu_enabled(True)
+
+        loaded = (time.perf_counter() - START_TIME) * 1000
+        print(f"Questions loaded after {loaded:.0f} ms ({self.loader.seconds * 1000:.0f} ms on the loading thread)")
+        Tracing.event('startup.questions_loaded', loaded)
+        # Used by benchmarks/compare_startup.py to measure the startup of a build
+        if os.environ.get('QUIZ_EXIT_AFTER_LOAD'):
+            QTimer.singleShot(0, self.close)
+
+    def load_blueprint(self):
+        """Read the exam blueprint, or return None to take EXAMQUESTIONNUMBER questions per category"""
+        path = get_resource_path(f'questions/{EXAMBLUEPRINT}')
+        if not os.path.exists(path):
+            return None
+        try:
+            return ExamBlueprint.from_file(path)
+        except (OSError, ValueError) as error:
+            print(f"Error loading exam blueprint {path}: {error}")
+            return None
+
+    def bank_failed(self, message):
+        """Tell the user that the quiz can't start without its questions"""
+        print(f"Error loading questions: {message}")
+        self.choose_category_label.setText("Die Fragen konnten nicht geladen werden.")
+
+    def set_menu_enabled(self, enabled):
+        """Enable or disable the category selection and the start buttons"""
+        for widget in (
+            self.category_combobox, self.start_button, self.repeat_marked_questions,
+            self.start_exam, self.start_review, self.show_statistics_button
+        ):
+            widget.setEnabled(enabled)
+        if enabled:
+            self.update_start_button()
+
+    def update_start_button(self):
+        """Allow starting a quiz only once something is selected"""
+        self.start_button.setEnabled(self.bank is not None and bool(self.get_selected_categories()))
+
+    def paintEvent(self, event):
+        """Measure the time until the window is drawn for the first time"""
+        super().paintEvent(event)
+        if self.first_paint is None:
+            self.first_paint = time.perf_counter() - START_TIME
+            print(f"Window first drawn after {self.first_paint * 1000:.0f} ms")
+            Tracing.event('startup.first_paint', self.first_paint * 1000)
 
     # Quiz Logic
 
     def toggle_subcategory_combo(self, text):
-        """Show/hide subcategory combo based on selection"""
-        self.category_combo.setVisible(text == "Unterkategorien aussuchen")
+        """Show/hide subcategory picker based on selection"""
+        self.subcategory_picker.setVisible(text == "Unterkategorien aussuchen")
+        self.update_start_button()
 
     def start_quiz(self):
         """Start the quiz with selected categories"""
@@ -240,507 +307,269 @@ class Quiz(QWidget):
         if not selected_categories:
             return
         # Load questions and initialize quiz state
-        self.questions = self.load_questions(selected_categories)
-        if not self.questions:
+        if not self.session.start(self.load_questions(selected_categories)):
             return
 
         self.initialize_quiz()
         self.show_question()
 
     def get_selected_categories(self):
-        """Get selected categories from UI"""
+        """Get the list of selected categories or subcategories from UI"""
         main_category = self.category_combobox.currentText()
-        return main_category if main_category != "Unterkategorien aussuchen" else self.category_combo.currentText()
+        return [main_category] if main_category != "Unterkategorien aussuchen" else self.subcategory_picker.selectedKeys()
 
     def load_questions(self, categories):
-        """Load questions a JSON file based on selected categories:
-        Reads a JSON file and keeps only entries where 'category' or 'subcategory' contains the target_str.
+        """Load questions based on selected categories:
+        Keeps only entries where 'category' or 'subcategory' is one of the selected categories.
         """
-        with open(get_resource_path(f'questions/{QUESTIONFILE}'), 'r', encoding='utf-8') as f:
-            data = json.load(f)
-
-        filtered_data = []
-        for entry in data:
-            category = entry.get('category', '')
-            subcategory = entry.get('subcategory', '')
-            # Check if the target string is present in either category or subcategory
-            if category in categories or subcategory in categories:
-                filtered_data.append(entry)
-        return filtered_data
-
-    def format_questions(self, questions):
-        """Add line breaks to questions and answers"""
-        return [
-            {
-                **q,
-                'question': add_newline(q['question']),
-                'options': [add_newline(opt) for opt in q['options']],
-                'correct': add_newline(q['correct'])
-            }
-            for q in questions
-        ]
+        with span('load_questions') as traced:
+            questions = self.session.load_questions(categories)
+            traced.set(count=len(questions))
+        return questions
 
     def initialize_quiz(self):
-        """Initialize quiz state and UI"""
-        self.current_question = 0
-        self.score = 0
-        self.wrong_questions.clear()
-        self.answer_selected = False
-
+        """Initialize the UI for the quiz the session has started"""
         # Hide category selection
         self.choose_category_label.hide()
         self.category_combobox.hide()
-        self.category_combo.hide()
+        self.subcategory_picker.hide()
         self.start_button.hide()
         self.repeat_marked_questions.hide()
         self.start_exam.hide()
+        self.start_review.hide()
+        self.show_statistics_button.hide()
 
         # Show progress bar
         self.progress_bar.show()
-        self.progress_bar.setMaximum(len(self.questions))
+        self.progress_bar.setMaximum(len(self.session.questions))
         self.progress_bar.setValue(0)
 
 
     def show_question(self):
         """Display the current question"""
-        # Clear previous question
-        self.clear_question_container()
-
-        # Get current question
-        question = self.questions[self.current_question]
-
-        # Add question components
-        self.add_question_text(question)
-        self.add_question_image(question.get("image", None))
-        self.add_answer_options(question["options"])
-        self.add_next_button()
-
-    def clear_question_container(self):
-        """Clear all widgets from the question container"""
-        for i in reversed(range(self.container.layout().count())): 
-            widget = self.container.layout().takeAt(i).widget()
-            if widget is not None: 
-                widget.deleteLater()
-
-    def add_question_text(self, question):
-        """Add the question text to the container"""
-        category = question["category"]
-        subcategory = question["subcategory"]
-        category_label = QLabel(f"{category} - {subcategory}")
-        question_label = QLabel(question["question"])
-        question_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        category_label.setAlignment(Qt.AlignmentFlag.AlignLeft)
-        question_label.setWordWrap(True)
-        category_label.setWordWrap(True)
-        question_label.setStyleSheet("""
-            background-color: white;
-            padding: 15px;
-            border-radius: 5px;
-            margin-bottom: 15px;
-        """)
-        category_label.setStyleSheet("""
-            padding: 5px;
-            border-radius: 5px;
-            margin-bottom: 5px;
-        """)
-        self.container.layout().addWidget(category_label)
-        self.container.layout().addWidget(question_label)
-
-    def add_question_image(self, image_path):
-        """Add an image to the question container, scaled to a consistent size."""
-        MAX_IMAGE_WIDTH = 800  # Maximum width for images
-        MAX_IMAGE_HEIGHT = 450  # Maximum height for images
-        ZOOM_FACTOR = 0.8      # Optional: Adjust this to zoom in or out
+        with span('show_question'):
+            # Get current question, usually prepared while the previous one was shown
+            self.prepared = self.look_ahead.take(self.session.current)
+
+            # Swap the prepared content into the question view
+            with span('show_question.text'):
+                self.add_question_text(self.prepared)
+            with span('show_question.image'):
+                self.add_question_image(self.prepared.image)
+            with span('show_question.options'):
+                self.add_answer_options(self.prepared.options)
+            with span('show_question.buttons'):
+                self.add_next_button()
+            self.view.show()
+
+        # Prepare the neighbouring questions once this question has been drawn
+        QTimer.singleShot(0, self.prepare_neighbours)
+
+        # Report the polish cost once Qt has processed the events of this question
+        app = QApplication.instance()
+        if isinstance(app, MeteredApplication):
+            QTimer.singleShot(0, app.end_frame)
+
+    def prepare_question(self, entry):
+        """Compute everything needed to display a question: its text, wrapped options and image.
+        Starts decoding the image in the background if it is not cached yet."""
+        question = self.bank.body(entry)
+        image_path = question.get("image", None)
+        image = None
         if image_path:
-            image_path = get_resource_path(image_path)
-            try:
-                image = QImage()
-                if image.load(image_path):
-                    pixmap = QPixmap.fromImage(image)
-
-                    # Calculate scaling factor based on MAX dimensions
-                    original_width = pixmap.width()
-                    original_height = pixmap.height()
-                    
-                    # Scale factor to ensure the image fits within MAX dimensions
-                    scale_factor = min(
-                        MAX_IMAGE_WIDTH / original_width,
-                        MAX_IMAGE_HEIGHT / original_height
-                    )
-
-                    # Optional: Apply a zoom factor (optional adjustment)
-                    scale_factor = scale_factor * ZOOM_FACTOR
-
-                    scaled_width = int(original_width * scale_factor)
-                    scaled_height = int(original_height * scale_factor)
-
-                    # Scale the pixmap while preserving aspect ratio
-                    scaled_pixmap = pixmap.scaled(
-                        scaled_width,
-                        scaled_height,
-                        Qt.AspectRatioMode.KeepAspectRatio
-                    )
-
-                    # Create a label to display the scaled pixmap
-                    image_label = QLabel()
-                    image_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-                    image_label.setPixmap(scaled_pixmap)
-                    image_label.setStyleSheet("""
-                        background-color: white;
-                        padding: 10px;
-                        border-radius: 5px;
-                        margin: 15px 0;
-                    """)
-                    image_label.setSizePolicy(QSizePolicy.Policy.Preferred, QSizePolicy.Policy.Fixed)
-                    # Add to the container
-                    self.container.layout().addWidget(image_label)
-
-            except Exception as e:
-                print(f"Error loading image: {e}")
+            image = (get_resource_path(image_path), *IMAGE_SIZE)
+            self.images.request(*image)
+        return PreparedQuestion(
+            question,
+            f"{question['category']} - {question['subcategory']}",
+            question["question"],
+            # Wrapped once per question and kept by the bank
+            self.bank.display_options(question, OPTION_WRAP_WIDTH),
+            image
+        )
 
+    def prepare_neighbours(self):
+        """Prepare the previous and next question while the user answers this one"""
+        if self.session.questions:
+            self.look_ahead.prepare_around(self.session.questions, self.session.current_question)
+
+    def add_question_text(self, prepared):
+        """Show the question text and its category"""
+        self.view.set_text(prepared.header, prepared.text)
+
+    def add_question_image(self, key):
+        """Show the question's image, scaled to a consistent size.
+        Images that are not cached yet are decoded in the background;
+        a placeholder is shown until they are ready."""
+        self.current_image = None
+        if key is None:
+            self.view.set_image(None)
+            return
+        pixmap = self.images.request(*key)
+        if pixmap is not None:
+            # Show the scaled pixmap in the image slot of the question view
+            self.view.set_image(pixmap)
+        else:
+            self.current_image = key
+            self.view.set_image_loading()
+
+    def image_ready(self, key, pixmap):
+        """Show a decoded image if it still belongs to the current question"""
+        if key == self.current_image:
+            self.current_image = None
+            self.view.set_image(pixmap)
+
+    def image_failed(self, key):
+        """Hide the placeholder of an image that could not be loaded"""
+        print(f"Error loading image: {key[0]}")
+        if key == self.current_image:
+            self.current_image = None
+            self.view.set_image(None)
 
     def add_answer_options(self, options):
-        """Create and add answer options to the container"""
-        answer_group = QButtonGroup()
-        answer_group.setExclusive(True)
-        
-        for option in options:
-            option = add_newline(option, max_length = 140)
-            button = QRadioButton(option)
-            button.setStyleSheet("""
-                QRadioButton {
-                    background-color: white;
-                    padding: 10px;
-                    margin: 5px 0;
-                    border: 1px solid #ddd;
-                    border-radius: 3px;              
-                    white-space: pre-wrap; 
-                }
-                QRadioButton:hover {
-                    background-color: #f5f5f5;
-                }
-                QRadioButton:checked {
-                    background-color: #d3f1ff;
-                    border-color: #0398c6;
-                }
-            """)
-            button.clicked.connect(lambda: self.store_answer())
-            answer_group.addButton(button)
-            self.container.layout().addWidget(button)
-        self.answer_group = answer_group
-        self.answer_group.setObjectName("radioGroup")
-
-    def store_answer(self):
-        """Check if the selected answer is correct"""
-        self.answer_selected = True
-        question = self.questions[self.current_question]
-        questions = question['options']
-        correct_answer = question["correct"]
-        main_category = question['category']
-
-        # Get answer chosen by the user:
-        button = self.sender()
-        if button.isChecked():
-            selected_answer = button.text()
+        """Show the answer options in the option buttons of the question view"""
+        self.view.set_options(options)
 
+    def store_answer(self, selected_answer):
+        """Store the answer at position selected_answer for the current question"""
         # Store the selected answer for evaluation later
-        self.user_answers[self.current_question] = {
-            'question': question['question'],
-            'selected': selected_answer,
-            'correct': question['correct'],
-            'options':question['options'],
-            'main_category':main_category
-        }
+        self.session.answer(selected_answer)
 
     def add_next_button(self):
-        """Add next button to the container"""
-        if self.current_question < len(self.questions) - 1:
+        """Update the navigation buttons for the current question"""
+        if not self.session.is_last():
             button_text = "Nächste Frage"
-            next_action = self.next_question
         else:
             button_text = "Quiz beenden"
-            next_action = self.finish_quiz
-
-        button_container = QWidget()
-        button_container.setLayout(QHBoxLayout())
-
-        # Add previous button
-        if self.current_question > 0:
-            previous_button = QPushButton("Zurück zur vorherigen Frage")
-            previous_button.setStyleSheet("""
-                QPushButton {
-                    background-color: #73c2ff;
-                    padding: 10px;
-                    margin-right: 10px;
-                }
-                QPushButton:hover {
-                    background-color: #2ECCFA;
-                }
-            """)
-            previous_button.clicked.connect(self.previous_question)
+        # Don't show a previous button on first question
+        self.view.set_navigation(
+            self.session.has_previous(),
+            self.session.current["marked"],
+            button_text
+        )
+
+    def next_or_finish(self):
+        """Go to the next question, or finish the quiz after the last one"""
+        if not self.session.is_last():
+            self.next_question()
         else:
-            previous_button = None  # Don't show a previous button on first question
-        self.mark_button = QPushButton("Frage markieren" if self.questions[self.current_question]["marked"] == False else "Frage aus markierten Fragen entfernen")
-        self.mark_button.setStyleSheet("""
-            QPushButton {
-                background-color: #ff6b6b;
-                padding: 10px;
-                margin-right: 10px;
-            }
-            QPushButton:hover {
-                background-color: #ff5252;
-            }
-        """)
-        self.mark_button.clicked.connect(self.mark_question)
-
-        next_button = QPushButton(button_text)
-        next_button.setStyleSheet("""
-            QPushButton {
-                background-color: #73c2ff;
-                padding: 10px;
-            }
-            QPushButton:hover {
-                background-color: #2ECCFA;
-            }
-        """)
-        next_button.clicked.connect(next_action)
-
-        if previous_button:
-            button_container.layout().addWidget(previous_button)
-        button_container.layout().addWidget(self.mark_button)
-        button_container.layout().addWidget(next_button)
-
-        self.container.layout().addWidget(button_container)
+            self.finish_quiz()
 
     def next_question(self):
         """Move to the next question"""
-        if not self.answer_selected:
-            if self.current_question not in self.wrong_questions:
-                self.wrong_questions.append(self.current_question)
-
-        self.answer_selected = False
-        self.progress_bar.setValue(self.current_question + 1)
-        self.current_question += 1
+        self.session.next()
+        self.progress_bar.setValue(self.session.current_question)
         self.show_question()
 
     def previous_question(self):
         """Move to previous question. If the user selected an answer for that question already, click on it again."""
         # Move current question index and progress bar status to that of the previous question:
-        self.current_question -= 1
-        self.progress_bar.setValue(self.current_question - 1)
+        selected = self.session.previous()
+        self.progress_bar.setValue(self.session.current_question)
         self.show_question()
         # If the user had clicked on an answer, display this click to the user again:
-        for button in self.answer_group.buttons():
-            try:
-                if button.text() == self.user_answers[self.current_question]['selected']:
-                    button.click()  # Simulates the button click
-            except KeyError: # If the user selected no answer, no button needs to be clicked.
-                pass
+        if selected is not None:
+            self.view.select_option(selected)  # Simulates the button click
 
     def finish_quiz(self):
         """End the quiz and show results"""
-        # Reset evaluation state
-        self.score = 0
-        self.wrong_questions.clear()
-        if self.exam_mode == True:
-            for j in self.categories:
-                questionlist = []
-                len_questions = 0
-                self.score = 0
-                for i in range(len(self.questions)):
-                    if j in self.user_answers[i]['main_category']:
-                        len_questions = len_questions + 1
-                        if i in self.user_answers:
-                            selected = self.user_answers[i]['selected']
-                            correct = self.user_answers[i]['correct']
-                            options = self.user_answers[i]['options']
-                            distance_to_A = Levenshtein.distance(selected, correct)
-                            distances_to_others = [Levenshtein.distance(selected, s) for s in options if s != correct]
-                            answer_true = all(distance_to_A < d for d in distances_to_others)
-
-                            if answer_true:
-                                self.score += 1
-                            else:
-                                self.wrong_questions.append(i)
-                            questionlist.append(self.user_answers[i])
-                        # Show results
-                total_questions = len_questions
-                try:
-                    score_percentage = (self.score / total_questions) * 100
-
-                    if score_percentage >= 75:
-                        endtext = f"Quiz in Kategorie {j} erfolgreich abgeschlossen! \nHerzlichen Glückwunsch!"
-                    else:
-                        endtext = f"Quiz in Kategorie {j} leider nicht bestanden. \nBeim nächsten Mal klappt's bestimmt besser!"
-
-
-                    result_msg = (
-                                f"{endtext}\n\n"
-                                f"Ergebnis: {self.score}/{total_questions}\n"
-                                f"Prozentuale Bewertung: {score_percentage:.1f}%"
-                        )
-                                    # Show result message and ask to repeat wrong answers
-                    if score_percentage >= 75:
-                        QMessageBox.information(self, "Quiz beendet.", result_msg)
-                    else:
-                        QMessageBox.information(self, "Quiz beendet.",  result_msg)
-                except ZeroDivisionError:
-                    pass
-            # End exam mode:
-            self.exam_mode = False
+        exam_mode = self.session.exam_mode
+        # Grade all answers in one pass; the session records them in the bank.
+        # Only grading is traced, the result dialogs wait for the user.
+        with span('finish_quiz', exam=exam_mode) as traced:
+            report = self.session.finish()
+            traced.set(count=report.total)
+        if exam_mode:
+            # One line per category in a single summary
+            QMessageBox.information(self, "Prüfung beendet.", report.summary())
             self.back_to_menu()
+            return
+
+        # Show results
+        if report.percentage >= PASS_PERCENTAGE:
+            endtext = "Quiz erfolgreich abgeschlossen! \nHerzlichen Glückwunsch!"
         else:
-            # Compare all answers and calculate results
-            for i in range(len(self.questions)):
-                if i in self.user_answers:
-                    selected = self.user_answers[i]['selected']
-                    correct = self.user_answers[i]['correct']
-                    options = self.user_answers[i]['options']
-                    distance_to_A = Levenshtein.distance(selected, correct)
-                    distances_to_others = [Levenshtein.distance(selected, s) for s in options if s != correct]
-                    answer_true = all(distance_to_A < d for d in distances_to_others)
-
-                    if answer_true:
-                        self.score += 1
-                    else:
-                        self.wrong_questions.append(i)
-                else:
-                    # If no answer was selected, mark the question as wrong
-                    self.wrong_questions.append(i)
-
-            # Show results
-            total_questions = len(self.questions)
-            score_percentage = (self.score / total_questions) * 100
-
-            if score_percentage >= 75:
-                endtext = "Quiz erfolgreich abgeschlossen! \nHerzlichen Glückwunsch!"
-            else:
-                endtext = "Quiz leider nicht bestanden. \nBeim nächsten Mal klappt's bestimmt besser!"
-
-            result_msg = (
-                f"{endtext}\n\n"
-                f"Ergebnis: {self.score}/{total_questions}\n"
-                f"Prozentuale Bewertung: {score_percentage:.1f}%"
-            )
+            endtext = "Quiz leider nicht bestanden. \nBeim nächsten Mal klappt's bestimmt besser!"
 
-            # Reset user answers for next quiz
-            self.user_answers.clear()
-
-            # Show result message and ask to repeat wrong answers
-            if score_percentage >= 75:
-                QMessageBox.information(self, "Quiz beendet.", result_msg)
-            else:
-                QMessageBox.information(self, "Quiz beendet.",  result_msg)
-
-            if self.wrong_questions:
-                repeat = QMessageBox.question(
-                    self,
-                    "Wiederholung",
-                    "Möchtest du die falsch oder nicht beantworteten Fragen noch einmal versuchen?",
-                    QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
-                )
-                if repeat == QMessageBox.StandardButton.Yes:
-                    self.repeat_wrong_questions()
-                    return
+        result_msg = (
+            f"{endtext}\n\n"
+            f"Ergebnis: {report.score}/{report.total}\n"
+            f"Prozentuale Bewertung: {report.percentage:.1f}%"
+        )
 
-            self.back_to_menu()
+        # Show result message and ask to repeat wrong answers
+        QMessageBox.information(self, "Quiz beendet.", result_msg)
+
+        if self.session.wrong_questions:
+            repeat = QMessageBox.question(
+                self,
+                "Wiederholung",
+                "Möchtest du die falsch oder nicht beantworteten Fragen noch einmal versuchen?",
+                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+            )
+            if repeat == QMessageBox.StandardButton.Yes:
+                self.repeat_wrong_questions()
+                return
+
+        self.back_to_menu()
 
     def repeat_wrong_questions(self):
         """Repeat questions that were answered incorrectly"""
-        self.questions = [self.questions[i] for i in self.wrong_questions]
-        self.wrong_questions.clear()
-        self.score = 0
-        self.current_question = 0
-        self.progress_bar.setMaximum(len(self.questions))
+        self.session.start_wrong()
+        self.progress_bar.setMaximum(len(self.session.questions))
         self.progress_bar.setValue(0)
         self.show_question()
 
-    def get_marked_questions(self):
-        """Helper function to load marked questions from JSON"""
-        try:
-            with open(get_resource_path(f'questions/{QUESTIONFILE}'), 'r', encoding='utf-8') as file:
-                questions =  json.load(file)
-                filtered_questions = [entry for entry in questions if entry["marked"] == True]
-                return filtered_questions
-
-        except (FileNotFoundError, json.JSONDecodeError):
-            return []
-
     def mark_question(self):
         """Implement method to mark questions if the user wants to repeat them later."""
-        # Load all questions from the JSON file
-        with open(get_resource_path(f'questions/{QUESTIONFILE}'), 'r', encoding='utf-8') as file:
-            all_questions = json.load(file)
-
-        # Get current question
-        question = self.questions[self.current_question]
-
-        # Find the index of the question 'question' in 'all_questions'.
-        for i, element in enumerate(all_questions):
-            if element["question"] ==  question['question']:
-                current_index = i
-
-        for i, question in enumerate(all_questions):
-            if i == current_index:
-                question["marked"] = not question["marked"]
-                break
-        
+        # Flip the flag of the current question in the bank,
+        # which stores it in the mark journal or the database
+        with span('mark_question'):
+            marked = self.session.toggle_mark()
+
         # Update button text based on new status
-        if all_questions[current_index]["marked"]:
-            self.mark_button.setText("Frage aus markierten Fragen entfernen")
-        else:
-            self.mark_button.setText("Frage markieren")
-        
-        # Save the updated questions back to the JSON file
-        with open(get_resource_path(f'questions/{QUESTIONFILE}'), 'w', encoding='utf-8') as file:
-            json.dump(all_questions, file, ensure_ascii=False, indent=4)
+        self.view.set_marked(marked)
 
     def repeat_marked_question(self):
         """Implement method to repeat marked questions."""
-        # Check if json file exists and contains questions. If not, give message: 'Keine Fragen markiert.'
-        try:
-            with open(get_resource_path(f'questions/{QUESTIONFILE}'), 'r', encoding='UTF-8') as f:
-                category_questions = json.load(f)
-                filtered_questions = [entry for entry in category_questions if entry["marked"] == True]
-                #formatted_questions = self.format_questions(filtered_questions)
-                # Disable formatting for now:
-                formatted_questions = filtered_questions
-                if not formatted_questions:
-                    self.info()
-                    return
-                self.questions = formatted_questions
-                self.initialize_quiz()
-                self.wrong_questions.clear()
-                self.score = 0
-                self.current_question = 0
-                self.show_question()
-        except FileNotFoundError:
+        # Check if there are marked questions. If not, give message: 'Keine Fragen markiert.'
+        if not self.session.start_marked():
             self.info()
+            return
+        self.initialize_quiz()
+        self.show_question()
 
     def create_exam(self):
         """ An exam contains questions choosen randomly from each section.
         For each section, the user gets informed if they passed or not."""
-        # Load questions and initialize quiz state
-        self.exam_mode = True
-
-        # Load categories and subcategories
-        with open(get_resource_path(f'questions/{QUESTIONFILE}'), 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        categories = [element.get('category') for element in data]
-        self.categories = list(set(categories))
-        subcategories = [element.get('subcategory') for element in data]
-        self.subcategories = list(set(subcategories))
-
-        questionlist = []
-        # Choose random questions from each category:
-        for category in self.categories:
-            questions = self.load_questions(category)
-            questions = random.sample(questions, EXAMQUESTIONNUMBER)
-            questionlist.extend(questions)
-        self.questions = questionlist
+        # Choose random questions from the bank's index, as the blueprint says
+        try:
+            if not self.session.start_exam():
+                return
+        except ValueError as error:
+            print(f"Error creating exam: {error}")
+            QMessageBox.information(self, "Prüfung nicht möglich.", "Es gibt nicht genug Fragen für diese Prüfung.")
+            return
+        for key, wanted, size in self.session.blueprint.shortfall:
+            print(f"{key!r} has only {size} of {wanted} questions for the exam")
+        self.initialize_quiz()
+        self.show_question()
+
+    def review_due_questions(self):
+        """Repeat the questions that are due again, the longest overdue first"""
+        if not self.session.start_review(REVIEWQUESTIONNUMBER):
+            QMessageBox.information(
+                self,
+                'Keine Fragen fällig.',
+                'Beantwortete Fragen kommen hier wieder, wenn es Zeit ist, sie zu wiederholen.'
+            )
+            return
         self.initialize_quiz()
         self.show_question()
 
+    def show_statistics(self):
+        """Show the answers and error rates per category from the answer history"""
+        StatisticsView(self.bank.answer_statistics(), self).exec()
     
     def info(self):
         QMessageBox.information(
@@ -751,13 +580,12 @@ class Quiz(QWidget):
 
     def back_to_menu(self):
         """Return to the main menu"""
-        self.wrong_questions.clear()
-        self.score = 0
-        self.current_question = 0
-        self.questions.clear()
+        self.session.reset()
 
-        # Clear question container
-        self.clear_question_container()
+        # Hide the question view
+        self.view.hide()
+        self.look_ahead.clear()
+        self.prepared = None
 
         # Show category selection
         self.choose_category_label.show()
@@ -765,17 +593,42 @@ class Quiz(QWidget):
         self.start_button.show()
         self.repeat_marked_questions.show()
         if self.category_combobox.currentText() == "Unterkategorien aussuchen":
-            self.category_combo.show()
+            self.subcategory_picker.show()
         self.start_exam.show()
+        self.start_review.show()
+        self.show_statistics_button.show()
         self.progress_bar.hide()
 
-    def __del__(self):
-        """Clean up resources when widget is destroyed"""
-        self.clear_question_container()
+    def closeEvent(self, event):
+        """Write pending marks before the window closes"""
+        # Let a bank that is still loading finish first
+        if self.loader is not None:
+            self.loader.wait()
+        if self.bank is not None:
+            self.bank.close()
+            self.scheduler.close()
+        super().closeEvent(event)
 
 if __name__ == "__main__":
-    app = QApplication(sys.argv)
-    app.setStyleSheet('* { font-size: 12pt;}')
+    # Needed for the worker processes that load question folders in the built exe
+    multiprocessing.freeze_support()
+    import argparse
+    # --trace [file] or QUIZ_TRACE=<file> writes the time of each operation to a trace file;
+    # 'python Tracing.py <file>' prints percentiles per operation.
+    parser = argparse.ArgumentParser(description="Quiz")
+    parser.add_argument('--trace', nargs='?', const=Tracing.DEFAULT_TRACE_FILE, metavar='FILE',
+                        help="write the time of each operation to a JSON Lines trace file")
+    # Everything else is left to Qt
+    args, qt_args = parser.parse_known_args()
+    if args.trace:
+        Tracing.enable(args.trace)
+    else:
+        Tracing.enable_from_environment()
+    if os.environ.get('QUIZ_POLISH_STATS'):
+        app = MeteredApplication(sys.argv[:1] + qt_args)
+    else:
+        app = QApplication(sys.argv[:1] + qt_args)
+    apply_theme(app, os.environ.get('QUIZ_THEME', THEME))
     quiz = Quiz()
     quiz.show()
     sys.exit(app.exec())
\ No newline at end of file
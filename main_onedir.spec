@@ -0,0 +1,49 @@
+# -*- mode: python ; coding: utf-8 -*-
+# Builds the quiz as a folder (dist/main) instead of a single exe. Nothing has to be
+# unpacked when it starts, so it starts faster than the onefile build of main.spec.
+# The built-in questions and pictures can be replaced with an external data folder,
+# see DATA_DIR_FILE in main.py.
+
+
+a = Analysis(
+    ['main.py'],
+    pathex=[],
+    binaries=[],
+    # Add 'questions' and 'pictures' folders to datas
+    datas=[('questions', 'questions'), ('pictures', 'pictures')],
+    hiddenimports=[],
+    hookspath=[],
+    hooksconfig={},
+    runtime_hooks=[],
+    excludes=[],
+    noarchive=False,
+    optimize=0,
+)
+pyz = PYZ(a.pure)
+
+exe = EXE(
+    pyz,
+    a.scripts,
+    [],
+    exclude_binaries=True,  # Binaries and datas are placed next to the exe by COLLECT
+    name='main',
+    debug=False,
+    bootloader_ignore_signals=False,
+    strip=False,
+    upx=False,  # Compressed libraries would have to be unpacked at every start
+    console=False,  # Maintains windowed mode
+    disable_windowed_traceback=False,
+    argv_emulation=False,
+    target_arch=None,
+    codesign_identity=None,
+    entitlements_file=None,
+)
+coll = COLLECT(
+    exe,
+    a.binaries,
+    a.datas,
+    strip=False,
+    upx=False,
+    upx_exclude=[],
+    name='main',
+)